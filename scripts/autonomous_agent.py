@@ -3,12 +3,13 @@
 autonomous_agent.py - 毎朝リサーチ投稿デーモン (Phase 2)
 
 スケジュール: 毎朝 08:00
+  （--once で daily_research を1回実行して終了。systemd timer 用: scripts/systemd/）
 フロー: observe → think → act → reflect → notify
 
 LLM（ハイブリッド構成 - Issue #1）:
   - Ollama / qwen3:8b : 軽量タスク優先（テーマ選定・自己評価）
   - claude-haiku-4-5  : Ollama不可時のフォールバック
-  - claude-sonnet-4-6 : 複雑タスク専用（記事草稿生成）
+  - claude-sonnet-4-6 : 複雑タスク専用（記事草稿生成。簡易テーマ・前日高スコア時はHaikuで代替）
 
 安全設計:
   - 日次アクション上限: 50回
@@ -23,20 +24,28 @@ LLM（ハイブリッド構成 - Issue #1）:
 
 import os
 import re
-import glob
+import atexit
+import asyncio
 import json
+import queue
 import logging
+import sqlite3
 import subprocess
+import time
 from datetime import datetime, date, timezone, timedelta
+from typing import Iterator, Optional, Union
 
 import signal
+import sys
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import httpx
-import anthropic
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.executors.pool import ThreadPoolExecutor
+import orjson
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from memory_manager import MemoryManager
+from semantic_cache import SemanticCache
 
 JST = timezone(timedelta(hours=9))
 
@@ -47,13 +56,52 @@ DIARY_CHANNEL   = os.getenv("DIARY_CHANNEL_ID",   "1475552269222154312")   # age
 CHAT_CHANNEL    = os.getenv("AGENT_CHAT_CHANNEL_ID", "1475867265110114379") # agent-chat (Issue #18)
 AGENT_NAME = "autonomous-agent"
 MAX_DAILY_ACTIONS = 50
-AGENT_CHAT_DIR = "/tmp/autonomous-agent-chat"  # Go APIがここにchatメッセージを書き込む
+# 非推奨: Go hub のファイル経由 IPC。hub は http://localhost:AGENT_CHAT_PORT/chat へ直接 POST する。
+# 移行期間中のみ AGENT_CHAT_FILE_IPC=1（既定）でディレクトリ監視を残す。次リリースで削除予定
+AGENT_CHAT_DIR = "/tmp/autonomous-agent-chat"
+AGENT_CHAT_FILE_IPC = os.getenv("AGENT_CHAT_FILE_IPC", "1") != "0"
 AGENT_CHAT_PORT = int(os.getenv("AGENT_CHAT_PORT", "18400"))
 
 # Ollama設定（Issue #1: ローカルLLM）
 OLLAMA_URL   = os.getenv("OLLAMA_URL",   "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen3:8b")
 OLLAMA_MODEL_CHAT = os.getenv("OLLAMA_MODEL_CHAT", "zono-agent:latest")
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+# セマンティックキャッシュ用の埋め込みは補助的なので短く打ち切り、失敗時はキャッシュなしで続行する
+OLLAMA_EMBED_TIMEOUT = 5  # 秒
+# コンテキスト長（KVキャッシュ確保量）。モデルの最大長ではなく用途に足る長さに抑える。
+# リクエストごとに値が変わるとモデルが再ロードされるため全呼び出しで共通の値を使う
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+OLLAMA_AVAILABLE_TTL = 30  # 秒（is_available の結果キャッシュ）
+# サーキットブレーカー: 連続失敗がこの回数に達したら一定時間 Ollama を呼ばず Claude に回す
+OLLAMA_BREAKER_FAIL_MAX = 5
+OLLAMA_BREAKER_RESET = 60  # 秒
+# モデルを VRAM に常駐させる時間（既定5分だと朝のリサーチ後に追い出され、次の chat で再ロード待ちになる）。
+# 数値（秒, -1 で無期限）または "30m" のような期間文字列。チャット用モデルは無期限に常駐させる
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_KEEP_ALIVE_CHAT = os.getenv("OLLAMA_KEEP_ALIVE_CHAT", "-1")
+
+# Claude Message Batches API（日次リサーチのClaude呼び出しを50%コストで実行。結果待ちは数分〜）
+USE_MESSAGE_BATCHES = os.getenv("ANTHROPIC_USE_BATCHES") == "1"
+BATCH_POLL_MAX_INTERVAL = 60     # 秒（指数バックオフの上限）
+BATCH_TIMEOUT = 2 * 60 * 60      # 秒（超過時はバッチをキャンセル）
+
+# 記事草稿モデル: 簡易テーマ or 前日スコア高ならHaiku（Sonnetより約4倍高速）
+WRITER_MODEL      = "claude-sonnet-4-6"
+WRITER_MODEL_FAST = "claude-haiku-4-5-20251001"
+WRITER_FAST_MAX_THEME_LEN = 60
+WRITER_FAST_MIN_LAST_SCORE = 85
+
+# 再起動をまたいで保持する状態ファイルの置き場
+STATE_DIR = os.path.expanduser(os.getenv("AGENT_STATE_DIR", "~/.cache/autonomous_agent"))
+LAST_SCORE_PATH = os.path.join(STATE_DIR, "last_score.json")
+GH_CACHE_PATH = os.path.join(STATE_DIR, "gh.json")
+SEMCACHE_PATH = os.path.join(STATE_DIR, "semcache.json")
+STATE_DB_PATH = os.path.join(STATE_DIR, "state.db")  # 日次アクション数
+GH_CACHE_TTL = 30 * 60  # 秒（Search APIは未認証30req/分のため再実行時はキャッシュを使う）
+
+# 0 にすると常駐プロセスは daily_research をスケジュールしない（systemd timer + --once で実行する場合）
+SCHEDULE_DAILY_RESEARCH = os.getenv("SCHEDULE_DAILY_RESEARCH", "1") != "0"
 
 # リサーチトピック（曜日で交互）
 # 月・水・金 = Web3, 火・木・土 = AI, 日 = 両方
@@ -66,8 +114,78 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# 429/5xx/529(overloaded)・接続エラー時の SDK 内蔵リトライ回数（指数バックオフ）
+ANTHROPIC_MAX_RETRIES = 4
+
+# Anthropic クライアントは初回使用時に生成（import anthropic が重いため起動を速くする）
+_client = None
+_aclient = None
+
+
+def _get_client():
+    """同期 Anthropic クライアントを取得（遅延import・遅延生成）"""
+    global _client
+    if _client is None:
+        import anthropic
+        _client = anthropic.Anthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_retries=ANTHROPIC_MAX_RETRIES,
+            http_client=anthropic.DefaultHttpxClient(http2=True),
+        )
+    return _client
+
+
+def _get_aclient():
+    """非同期 Anthropic クライアントを取得（observe要約などイベントループ上の補助タスク用）"""
+    global _aclient
+    if _aclient is None:
+        import anthropic
+        _aclient = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_retries=ANTHROPIC_MAX_RETRIES,
+            http_client=anthropic.DefaultAsyncHttpxClient(http2=True),
+        )
+    return _aclient
+
+# Hub API（Discord投稿）向けの共有HTTPクライアント（keep-aliveで接続を再利用）
+HUB_CLIENT = httpx.Client(
+    base_url=HUB_API_URL,
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=60.0),
+)
+# Ollama 向けの共有HTTPクライアント（推論は長いので timeout 長め・接続は長く保持）
+OLLAMA_CLIENT = httpx.Client(
+    base_url=OLLAMA_URL,
+    timeout=120.0,
+    limits=httpx.Limits(max_keepalive_connections=4, max_connections=8, keepalive_expiry=300.0),
+)
+atexit.register(HUB_CLIENT.close)
+atexit.register(OLLAMA_CLIENT.close)
+
+# MemoryManager はプロセス内で1つを使い回す（ChromaDB コレクションのオープンは重い）
+_mm: Optional[MemoryManager] = None
+_mm_lock = threading.Lock()
+
+
+def _get_mm() -> MemoryManager:
+    """MemoryManager シングルトンを取得（初回のみ生成）"""
+    global _mm
+    if _mm is None:
+        with _mm_lock:
+            if _mm is None:
+                _mm = MemoryManager()
+    return _mm
+
+
+# HN/GitHub 向けの AsyncClient（スケジューラと同じイベントループ上で使い回す）
+_async_http: Optional[httpx.AsyncClient] = None
+
+# 日次アクション数（think/summarize が別スレッド・別タスクで並行するためロックで保護）。
+# 再起動しても当日分の上限が効くよう、日付をキーに sqlite に永続化する
 action_count = 0
+_action_lock = threading.Lock()
+_action_db: Optional[sqlite3.Connection] = None
 
 
 # ─── ユーティリティ ──────────────────────────────────────────────────────────
@@ -83,20 +201,114 @@ def get_today_topics() -> str:
         return f"{TOPICS_WEB3} / {TOPICS_AI}"
 
 
-def notify_discord(message: str, is_alert: bool = False) -> None:
-    """hub-autonomous チャンネルにアクション結果を通知"""
+# Discord送信キュー: 投稿はワーカースレッドが非同期に送るため、呼び出し側はHTTP応答を待たない
+_discord_queue: "queue.Queue[tuple[str, str, str]]" = queue.Queue()
+
+# 連続投稿の結合: 最初の1件から最大 200ms 待って溜まった分（最大8件）をまとめて送る
+DISCORD_COALESCE_WINDOW = 0.2   # 秒
+DISCORD_COALESCE_MAX_ITEMS = 8
+DISCORD_MAX_MESSAGE_LEN = 1900  # Discordの上限2000字に余裕を持たせる
+
+# orjson で直列化済みのボディを送る際のヘッダ（httpx 内部の json エンコードを通さない）
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _post_discord(channel_id: str, message: str, label: str) -> None:
+    """Hub API 経由で1件投稿（失敗はログのみ）"""
     try:
-        httpx.post(
-            f"{HUB_API_URL}/api/v1/discord/reply",
-            json={
-                "channel_id": DISCORD_CHANNEL,
+        HUB_CLIENT.post(
+            "/api/v1/discord/reply",
+            content=orjson.dumps({
+                "channel_id": channel_id,
                 "message": message,
                 "sender_name": AGENT_NAME,
-            },
+            }),
+            headers=JSON_HEADERS,
             timeout=10,
         )
     except Exception as e:
-        log.warning(f"Discord通知失敗: {e}")
+        log.warning(f"{label}失敗: {e}")
+
+
+def _merge_discord_messages(items: list[tuple[str, str, str]]) -> list[tuple[str, str, str]]:
+    """同一チャンネル宛ての連続投稿を上限文字数以内で1メッセージに結合（順序は保つ）"""
+    merged: list[tuple[str, str, str]] = []
+    for channel_id, message, label in items:
+        if merged:
+            _, prev_message, prev_label = merged[-1]
+            combined = f"{prev_message}\n\n{message}"
+            if len(combined) <= DISCORD_MAX_MESSAGE_LEN:
+                merged[-1] = (channel_id, combined, prev_label)
+                continue
+        merged.append((channel_id, message, label))
+    return merged
+
+
+def _post_discord_channel(items: list[tuple[str, str, str]]) -> None:
+    """同一チャンネル宛ての投稿を結合したうえで順番通りに送る"""
+    for channel_id, message, label in _merge_discord_messages(items):
+        _post_discord(channel_id, message, label)
+
+
+def _drain_discord_queue() -> None:
+    """Discord送信キューを処理するワーカー（デーモンスレッド）
+
+    短い結合ウィンドウで溜まった投稿をまとめて取り出し、同一チャンネル宛ては1メッセージに
+    結合、チャンネルが異なるものは並行送信する（notify + diary のような連続投稿の往復を減らす）。
+    同一チャンネル内の順序は保つ。並行送信は素のスレッドで行う（atexit の flush 中は
+    concurrent.futures の終了フック後なので ThreadPoolExecutor に投入できない）。
+    """
+    while True:
+        items = [_discord_queue.get()]
+        deadline = time.monotonic() + DISCORD_COALESCE_WINDOW
+        while len(items) < DISCORD_COALESCE_MAX_ITEMS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(_discord_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        by_channel: dict[str, list[tuple[str, str, str]]] = {}
+        for item in items:
+            by_channel.setdefault(item[0], []).append(item)
+        try:
+            if len(by_channel) == 1:
+                _post_discord_channel(items)
+            else:
+                threads = [
+                    threading.Thread(target=_post_discord_channel, args=(group,), name="discord-post")
+                    for group in by_channel.values()
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+        finally:
+            for _ in items:
+                _discord_queue.task_done()
+
+
+def send_discord(channel_id: str, message: str, label: str = "Discord送信") -> None:
+    """Discord投稿を送信キューに積む（即座に戻る）"""
+    _discord_queue.put((channel_id, message, label))
+
+
+def flush_discord(timeout: float = 30) -> None:
+    """送信キューが空になるまで待つ（終了前に呼ぶ）"""
+    deadline = time.monotonic() + timeout
+    while _discord_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+
+threading.Thread(target=_drain_discord_queue, name="discord-sender", daemon=True).start()
+atexit.register(flush_discord)
+
+
+def notify_discord(message: str, is_alert: bool = False) -> None:
+    """hub-autonomous チャンネルにアクション結果を通知"""
+    send_discord(DISCORD_CHANNEL, message, label="Discord通知")
 
 
 DIARY_EMOJI = {
@@ -112,19 +324,8 @@ DIARY_EMOJI = {
 def post_diary(content: str, step: str = "think") -> None:
     """agent-diary チャンネルに思考プロセス・内省を投稿（Issue #9）"""
     emoji = DIARY_EMOJI.get(step, "💭")
-    try:
-        httpx.post(
-            f"{HUB_API_URL}/api/v1/discord/reply",
-            json={
-                "channel_id": DIARY_CHANNEL,
-                "message": f"{emoji} **[{step}]** {content}",
-                "sender_name": AGENT_NAME,
-            },
-            timeout=10,
-        )
-        log.debug(f"Diary posted [{step}]: {content[:60]}")
-    except Exception as e:
-        log.warning(f"Diary投稿失敗: {e}")
+    send_discord(DIARY_CHANNEL, f"{emoji} **[{step}]** {content}", label="Diary投稿")
+    log.debug(f"Diary posted [{step}]: {content[:60]}")
 
 
 # ─── ローカルLLM（Ollama）─────────────────────────────────────────────────
@@ -132,61 +333,458 @@ def post_diary(content: str, step: str = "think") -> None:
 class LocalLLM:
     """Ollama ローカルLLMクライアント（Issue #1）"""
 
-    @staticmethod
-    def is_available() -> bool:
-        """Ollamaサーバーが稼働中か確認"""
+    # is_available() の結果キャッシュ（呼び出しごとに /api/tags を叩かない）
+    _available = False
+    _available_at = float("-inf")
+    # サーキットブレーカーの状態
+    _failures = 0
+    _open_until = float("-inf")
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Ollamaサーバーが稼働中か確認（OLLAMA_AVAILABLE_TTL 秒キャッシュ。ブレーカー開放中は False）"""
+        now = time.monotonic()
+        if now < cls._open_until:
+            return False
+        if now - cls._available_at < OLLAMA_AVAILABLE_TTL:
+            return cls._available
         try:
-            r = httpx.get(f"{OLLAMA_URL}/api/tags", timeout=3)
-            return r.status_code == 200
+            r = OLLAMA_CLIENT.get("/api/tags", timeout=3)
+            available = r.status_code == 200
         except Exception:
-            return False
+            available = False
+        cls._available, cls._available_at = available, now
+        return available
+
+    @classmethod
+    def mark_unavailable(cls) -> None:
+        """推論失敗時に呼ぶ。TTLの間は is_available() が False を返し Claude にフォールバックする
+
+        連続失敗が OLLAMA_BREAKER_FAIL_MAX 回に達したらブレーカーを開き、
+        OLLAMA_BREAKER_RESET 秒間は Ollama を呼ばない（タイムアウト待ちを繰り返さない）。
+        """
+        now = time.monotonic()
+        cls._available, cls._available_at = False, now
+        cls._failures += 1
+        if cls._failures >= OLLAMA_BREAKER_FAIL_MAX:
+            cls._open_until = now + OLLAMA_BREAKER_RESET
+            cls._failures = 0
+            log.warning(f"Ollama 連続失敗: {OLLAMA_BREAKER_RESET}秒間 Claude にフォールバックします")
+
+    @classmethod
+    def _mark_success(cls) -> None:
+        cls._failures = 0
+
+    @staticmethod
+    def _is_server_failure(e: httpx.HTTPError) -> bool:
+        """Ollama 自体の障害か（接続・通信エラーと 5xx）。4xx はモデル未取得・不正な format 等の呼び出し側の問題"""
+        if isinstance(e, httpx.HTTPStatusError):
+            return e.response.status_code >= 500
+        return isinstance(e, httpx.TransportError)
 
     @staticmethod
-    def generate(prompt: str, max_tokens: int = 500) -> str:
-        """ローカルLLM（qwen3:8b）で推論。think:false でシンキングモード無効化"""
-        resp = httpx.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "think": False,   # qwen3のシンキングモードを無効化（高速化）
-                "options": {"num_predict": max_tokens, "temperature": 0.7},
-            },
-            timeout=120,
+    @retry(
+        # 再起動中の Ollama への接続失敗・切断のみ再試行（推論タイムアウトは再試行しない）
+        retry=retry_if_exception_type((httpx.ConnectError, httpx.RemoteProtocolError)),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True,
+    )
+    def _send(path: str, body: bytes, **kwargs) -> httpx.Response:
+        resp = OLLAMA_CLIENT.post(path, content=body, headers=JSON_HEADERS, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    @classmethod
+    def _post(cls, path: str, payload: dict, **kwargs) -> dict:
+        """Ollama API に POST して JSON を返す（接続エラー・5xx 時は可用性キャッシュを落とす）"""
+        if time.monotonic() < cls._open_until:
+            raise RuntimeError("Ollama サーキットブレーカー開放中")
+        try:
+            resp = cls._send(path, orjson.dumps(payload), **kwargs)
+        except httpx.HTTPError as e:
+            if cls._is_server_failure(e):
+                cls.mark_unavailable()
+            raise
+        cls._mark_success()
+        data = orjson.loads(resp.content)
+        cls._log_eval_rate(data)
+        return data
+
+    @staticmethod
+    def _generate_payload(
+        prompt: str,
+        max_tokens: int,
+        model: Optional[str],
+        system: Optional[str],
+        stream: bool,
+    ) -> dict:
+        """/api/generate のリクエストボディを構築（generate / stream 共通）"""
+        model = model or OLLAMA_MODEL
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "think": False,   # qwen3のシンキングモードを無効化（高速化）
+            "keep_alive": LocalLLM._keep_alive(model),
+            "options": {"num_predict": max_tokens, "num_ctx": OLLAMA_NUM_CTX, "temperature": 0.7},
+        }
+        if system is not None:
+            payload["system"] = system
+        return payload
+
+    @staticmethod
+    def _keep_alive(model: str) -> Union[int, str]:
+        """モデルごとの keep_alive 値（Ollama は単位なしの "-1" を期間として解釈できないため数値に変換）"""
+        value = OLLAMA_KEEP_ALIVE_CHAT if model == OLLAMA_MODEL_CHAT else OLLAMA_KEEP_ALIVE
+        try:
+            return int(value)
+        except ValueError:
+            return value
+
+    @classmethod
+    def warm_up(cls, models: tuple[str, ...] = (OLLAMA_MODEL, OLLAMA_MODEL_CHAT)) -> None:
+        """プロンプトなしの /api/generate でモデルを事前ロードし、初回リクエストのロード待ちをなくす"""
+        for model in dict.fromkeys(models):
+            try:
+                cls._post("/api/generate", {"model": model, "keep_alive": cls._keep_alive(model)})
+                log.info(f"Ollama ウォームアップ完了: {model}")
+            except Exception as e:
+                log.warning(f"Ollama ウォームアップ失敗 ({model}): {e}")
+
+    @staticmethod
+    def _log_eval_rate(data: dict) -> None:
+        """生成スループットをログ出力（eval_duration はナノ秒）"""
+        if data.get("eval_count") and data.get("eval_duration"):
+            tps = data["eval_count"] / (data["eval_duration"] / 1e9)
+            log.info(f"Ollama {data.get('model')}: {data['eval_count']} tokens, {tps:.1f} tok/s")
+
+    @staticmethod
+    def generate(
+        prompt: str,
+        max_tokens: int = 500,
+        format: Optional[dict] = None,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        """ローカルLLM（デフォルト qwen3:8b）で推論。think:false でシンキングモード無効化
+
+        format に JSON Schema を渡すと Ollama の構造化出力で応答を制約する。
+        model / system でチャット用モデル（zono-agent）等にも使える。
+        """
+        payload = LocalLLM._generate_payload(prompt, max_tokens, model, system, stream=False)
+        if format is not None:
+            payload["format"] = format
+        return LocalLLM._post("/api/generate", payload)["response"].strip()
+
+    @classmethod
+    def stream(
+        cls,
+        prompt: str,
+        max_tokens: int = 500,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> Iterator[str]:
+        """"stream": true で推論し、生成された断片を順に返すジェネレータ"""
+        if time.monotonic() < cls._open_until:
+            raise RuntimeError("Ollama サーキットブレーカー開放中")
+        payload = cls._generate_payload(prompt, max_tokens, model, system, stream=True)
+        try:
+            with OLLAMA_CLIENT.stream(
+                "POST", "/api/generate", content=orjson.dumps(payload), headers=JSON_HEADERS,
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    data = orjson.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        cls._log_eval_rate(data)
+                        break
+            cls._mark_success()
+        except httpx.HTTPError as e:
+            if cls._is_server_failure(e):
+                cls.mark_unavailable()
+            raise
+
+    @staticmethod
+    def embed(text: str) -> list[float]:
+        """埋め込みモデル（nomic-embed-text）でテキストをベクトル化
+
+        セマンティックキャッシュ専用。失敗しても可用性キャッシュ・ブレーカーには触れず、
+        再試行もしない（埋め込みモデル未取得の 404 で推論まで Claude に回さないため）。
+        """
+        resp = OLLAMA_CLIENT.post(
+            "/api/embed",
+            content=orjson.dumps({
+                "model": OLLAMA_EMBED_MODEL,
+                "input": text,
+                "keep_alive": LocalLLM._keep_alive(OLLAMA_EMBED_MODEL),
+            }),
+            headers=JSON_HEADERS,
+            timeout=OLLAMA_EMBED_TIMEOUT,
         )
         resp.raise_for_status()
-        return resp.json()["response"].strip()
+        return orjson.loads(resp.content)["embeddings"][0]
+
+
+# think / judge_importance 用のセマンティックキャッシュ（類似プロンプトならLLMを呼ばない）。
+# Ollama 停止中は埋め込みを試みずにそのまま生成する
+SEMCACHE = SemanticCache(SEMCACHE_PATH, embed=LocalLLM.embed, enabled=LocalLLM.is_available)
+atexit.register(SEMCACHE.save)
+
+
+def _get_action_db() -> sqlite3.Connection:
+    """アクション数の永続化DBを取得（初回のみ作成。前日以前の行は削除）。_action_lock 保持下で呼ぶ"""
+    global _action_db
+    if _action_db is None:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        _action_db = sqlite3.connect(STATE_DB_PATH, check_same_thread=False)
+        _action_db.execute("CREATE TABLE IF NOT EXISTS action_count (day TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        _action_db.execute("DELETE FROM action_count WHERE day != ?", (date.today().isoformat(),))
+        _action_db.commit()
+    return _action_db
 
 
 def count_action(label: str) -> bool:
-    """アクション数をカウント。上限超過でFalseを返す"""
+    """当日のアクション数をカウント。上限超過でFalseを返す"""
     global action_count
-    action_count += 1
-    if action_count > MAX_DAILY_ACTIONS:
+    today = date.today().isoformat()
+    with _action_lock:
+        db = _get_action_db()
+        row = db.execute("SELECT count FROM action_count WHERE day = ?", (today,)).fetchone()
+        n = row[0] if row else 0
+        exceeded = n >= MAX_DAILY_ACTIONS
+        if not exceeded:
+            n += 1
+            db.execute(
+                "INSERT INTO action_count (day, count) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET count = excluded.count",
+                (today, n),
+            )
+            db.commit()
+        action_count = n
+    if exceeded:
         log.warning(f"日次アクション上限({MAX_DAILY_ACTIONS})超過。スキップ: {label}")
         notify_discord(f"⚠️ 日次アクション上限到達。本日の処理を停止します。")
         return False
-    log.info(f"[action {action_count}/{MAX_DAILY_ACTIONS}] {label}")
+    log.info(f"[action {n}/{MAX_DAILY_ACTIONS}] {label}")
     return True
 
 
+def claude_generate(batchable: bool = False, **params) -> str:
+    """Claude API をストリーミングで呼び出し、応答テキストを返す
+
+    messages.create() の完了待ちではなく messages.stream() で逐次受信する。
+    batchable=True かつ ANTHROPIC_USE_BATCHES=1 の場合は Message Batches API 経由で実行する。
+    その他の引数は messages.create() と同じ。
+    """
+    if batchable and USE_MESSAGE_BATCHES:
+        results = claude_generate_batch({"req-0": params})
+        if "req-0" not in results:
+            raise RuntimeError("Message batch request failed")
+        return results["req-0"]
+
+    with _get_client().messages.stream(**params) as stream:
+        text = "".join(stream.text_stream).strip()
+        log_cache_usage(stream.get_final_message())
+    return text
+
+
+def claude_tool_call(tool: dict, batchable: bool = False, **params) -> dict:
+    """tool_choice で指定ツールの呼び出しを強制し、その入力（構造化データ）を返す
+
+    応答テキストからJSONを切り出す必要がなく、スキーマに沿った dict が直接得られる。
+    batchable の扱いは claude_generate() と同じ。
+    """
+    params = {
+        **params,
+        "tools": [tool],
+        "tool_choice": {"type": "tool", "name": tool["name"]},
+    }
+    if batchable and USE_MESSAGE_BATCHES:
+        messages = _run_message_batch({"req-0": params})
+        if "req-0" not in messages:
+            raise RuntimeError("Message batch request failed")
+        message = messages["req-0"]
+    else:
+        message = _get_client().messages.create(**params)
+        log_cache_usage(message)
+    for block in message.content:
+        if block.type == "tool_use":
+            return dict(block.input)
+    raise RuntimeError(f"tool_use ブロックがありません: {tool['name']}")
+
+
+def claude_generate_batch(requests: dict[str, dict]) -> dict[str, str]:
+    """Message Batches API に複数リクエストを一括投入し、{custom_id: 応答テキスト} を返す
+
+    失敗・期限切れのリクエストは結果に含めない。
+    """
+    return {
+        cid: "".join(block.text for block in message.content if block.type == "text").strip()
+        for cid, message in _run_message_batch(requests).items()
+    }
+
+
+def _run_message_batch(requests: dict[str, dict]) -> dict:
+    """Message Batches API に投入して完了まで待ち、{custom_id: Message} を返す"""
+    client = _get_client()
+    batch = client.messages.batches.create(
+        requests=[{"custom_id": cid, "params": params} for cid, params in requests.items()],
+    )
+    log.info(f"Message batch 投入: {batch.id} ({len(requests)}件)")
+
+    delay = 5
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while batch.processing_status != "ended":
+        if time.monotonic() > deadline:
+            client.messages.batches.cancel(batch.id)
+            raise TimeoutError(f"Message batch {batch.id} が {BATCH_TIMEOUT}秒以内に完了しませんでした")
+        time.sleep(delay)
+        delay = min(delay * 2, BATCH_POLL_MAX_INTERVAL)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    results = {}
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type != "succeeded":
+            log.warning(f"Message batch {batch.id} [{entry.custom_id}] 失敗: {entry.result.type}")
+            continue
+        results[entry.custom_id] = entry.result.message
+        log_cache_usage(entry.result.message)
+    log.info(f"Message batch 完了: {batch.id} ({len(results)}/{len(requests)}件成功)")
+    return results
+
+
+def load_last_score() -> float:
+    """前回の reflect スコアを読み込む（未記録なら0）"""
+    try:
+        with open(LAST_SCORE_PATH, "rb") as f:
+            return float(orjson.loads(f.read()).get("score", 0))
+    except (OSError, ValueError):
+        return 0.0
+
+
+def save_last_score(score: float) -> None:
+    """reflect スコアを次回のモデル選択用に保存"""
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(LAST_SCORE_PATH, "wb") as f:
+            f.write(orjson.dumps({"date": date.today().isoformat(), "score": score}))
+    except OSError as e:
+        log.warning(f"スコア保存失敗: {e}")
+
+
+def pick_writer_model(theme: str, last_score: float) -> str:
+    """記事草稿モデルを選択: 簡易テーマ or 前日スコアが十分高ければHaiku、それ以外はSonnet"""
+    theme_name = re.split(r"[（(]理由", theme)[0].strip()
+    if len(theme_name) < WRITER_FAST_MAX_THEME_LEN or last_score >= WRITER_FAST_MIN_LAST_SCORE:
+        return WRITER_MODEL_FAST
+    return WRITER_MODEL
+
+
+PROMPT_DESC_MAX_LEN = 80
+ACT_HN_TOP_K = 5  # act の参考情報に渡す HN 記事数
+
+
+def format_hn_stories(stories: list[dict]) -> str:
+    """HN記事をプロンプト用の箇条書きに圧縮（テーマ選定にはタイトルだけで足りるので URL・スコアは除外）"""
+    return "\n".join(f"- {s['title']}" for s in stories)
+
+
+def format_gh_repos(repos: list[dict]) -> str:
+    """GitHubリポジトリをプロンプト用の箇条書きに圧縮（説明文は切り詰め）"""
+    lines = []
+    for r in repos:
+        desc = (r.get("description") or "")[:PROMPT_DESC_MAX_LEN]
+        lines.append(f"- {r['name']} ★{r['stars']}" + (f": {desc}" if desc else ""))
+    return "\n".join(lines)
+
+
+def cached_system(static: str) -> list[dict]:
+    """静的な指示（ルーブリック・要件）を cache_control 付きの system blocks に変換
+
+    日ごとに変わる部分は user メッセージ側に置くことで、system プレフィックスが
+    毎回バイト一致し Anthropic prompt caching が効く。
+    """
+    return [{"type": "text", "text": static, "cache_control": {"type": "ephemeral"}}]
+
+
+def log_cache_usage(message) -> None:
+    """prompt caching のヒット状況をログ出力"""
+    usage = getattr(message, "usage", None)
+    if usage is None:
+        return
+    log.info(
+        f"Claude usage ({message.model}): input={usage.input_tokens} "
+        f"cache_write={usage.cache_creation_input_tokens or 0} "
+        f"cache_read={usage.cache_read_input_tokens or 0} output={usage.output_tokens}"
+    )
+
+
 # ─── observe ────────────────────────────────────────────────────────────────
 
-def fetch_hn_top(n: int = 10) -> list[dict]:
-    """Hacker News Top Stories を取得"""
+HN_API_URL = "https://hacker-news.firebaseio.com/v0"
+HN_FANOUT_TIMEOUT = 6  # 秒（item取得全体の上限。超過分は部分結果で続行）
+HN_MAX_CONCURRENCY = 10  # Firebase へのitem同時リクエスト数の上限
+# 設定時は GitHub 検索を GraphQL 経由にする（GraphQL API は認証必須）
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+
+def _read_cache(path: str, key: str, ttl: float):
+    """JSONファイルキャッシュから ttl 秒以内に保存された値を返す（なければNone）"""
     try:
-        r = httpx.get(
-            "https://hacker-news.firebaseio.com/v0/topstories.json",
-            timeout=10,
-        )
-        ids = r.json()[:n]
+        with open(path, "rb") as f:
+            saved_at, value = orjson.loads(f.read())[key]
+    except (OSError, ValueError, KeyError):
+        return None
+    return value if time.time() - saved_at < ttl else None
+
+
+def _write_cache(path: str, key: str, value, ttl: float) -> None:
+    """JSONファイルキャッシュに値を保存（期限切れエントリは同時に掃除）"""
+    now = time.time()
+    try:
+        with open(path, "rb") as f:
+            entries = {k: v for k, v in orjson.loads(f.read()).items() if now - v[0] < ttl}
+    except (OSError, ValueError):
+        entries = {}
+    entries[key] = [now, value]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(entries))
+    except OSError as e:
+        log.warning(f"キャッシュ保存失敗 ({path}): {e}")
+
+
+async def _fetch_hn_top_async(http: httpx.AsyncClient, n: int = 10) -> list[dict]:
+    """Hacker News Top Stories を取得（各itemは asyncio.gather で並行取得）"""
+    try:
+        r = await http.get(f"{HN_API_URL}/topstories.json", timeout=10)
+        ids = orjson.loads(r.content)[:n]
+        sem = asyncio.Semaphore(HN_MAX_CONCURRENCY)
+
+        async def fetch_item(sid: int) -> httpx.Response:
+            async with sem:
+                return await http.get(f"{HN_API_URL}/item/{sid}.json", timeout=5)
+
+        tasks = [asyncio.create_task(fetch_item(sid)) for sid in ids]
+        if not tasks:
+            return []
+        # 全体の待ち時間に上限を設け、遅いitemは切り捨てて取得済み分だけ使う
+        _, pending = await asyncio.wait(tasks, timeout=HN_FANOUT_TIMEOUT)
+        for t in pending:
+            t.cancel()
+        if pending:
+            log.warning(f"HN item {len(pending)}/{len(tasks)}件がタイムアウト。取得済み分のみ使用")
         stories = []
-        for sid in ids:
-            item = httpx.get(
-                f"https://hacker-news.firebaseio.com/v0/item/{sid}.json",
-                timeout=5,
-            ).json()
+        for t in tasks:  # ランキング順を維持
+            if t.cancelled() or not t.done() or t.exception() is not None:
+                continue
+            item = orjson.loads(t.result().content)
             if item and item.get("title"):
                 stories.append({
                     "title": item.get("title", ""),
@@ -199,47 +797,126 @@ def fetch_hn_top(n: int = 10) -> list[dict]:
         return []
 
 
-def fetch_github_trending(topic_hint: str) -> list[dict]:
+# 必要な4フィールドだけを取得する GraphQL クエリ（REST の全リポジトリオブジェクトより大幅に小さい）
+GH_SEARCH_GRAPHQL = """query($q: String!) {
+  search(query: $q, type: REPOSITORY, first: 5) {
+    nodes { ... on Repository { nameWithOwner description stargazerCount url } }
+  }
+}"""
+
+
+async def _search_github_graphql(http: httpx.AsyncClient, q: str) -> list[dict]:
+    """GitHub GraphQL API でスター順にリポジトリ検索（要 GITHUB_TOKEN）"""
+    r = await http.post(
+        "https://api.github.com/graphql",
+        content=orjson.dumps({"query": GH_SEARCH_GRAPHQL, "variables": {"q": f"{q} sort:stars-desc"}}),
+        headers={**JSON_HEADERS, "Authorization": f"Bearer {GITHUB_TOKEN}"},
+        timeout=10,
+    )
+    r.raise_for_status()
+    nodes = orjson.loads(r.content)["data"]["search"]["nodes"]
+    return [
+        {
+            "name": node["nameWithOwner"],
+            "description": node.get("description") or "",
+            "stars": node["stargazerCount"],
+            "url": node["url"],
+        }
+        for node in nodes
+        if node
+    ]
+
+
+async def _fetch_github_trending_async(http: httpx.AsyncClient, topic_hint: str) -> list[dict]:
     """GitHub Trending に近い情報を GitHub Search API で代替取得"""
     # GitHubのTrending APIは非公式のため、過去7日の高スターリポジトリで代替
     query = "ai llm agent" if "AI" in topic_hint else "defi web3 blockchain"
+    since = (date.today() - timedelta(days=7)).isoformat()
+    cache_key = f"{query}|{since}"
+    cached = _read_cache(GH_CACHE_PATH, cache_key, GH_CACHE_TTL)
+    if cached is not None:
+        log.info("GitHub trending: キャッシュを使用")
+        return cached
+
     try:
-        r = httpx.get(
-            "https://api.github.com/search/repositories",
-            params={
-                "q": f"{query} created:>2026-02-17",
-                "sort": "stars",
-                "order": "desc",
-                "per_page": 5,
-            },
-            headers={"Accept": "application/vnd.github+json"},
-            timeout=10,
-        )
-        repos = r.json().get("items", [])
-        return [
-            {
-                "name": repo["full_name"],
-                "description": repo.get("description", ""),
-                "stars": repo["stargazers_count"],
-                "url": repo["html_url"],
-            }
-            for repo in repos
-        ]
+        if GITHUB_TOKEN:
+            result = await _search_github_graphql(http, f"{query} created:>{since}")
+        else:
+            r = await http.get(
+                "https://api.github.com/search/repositories",
+                params={
+                    "q": f"{query} created:>{since}",
+                    "sort": "stars",
+                    "order": "desc",
+                    "per_page": 5,
+                },
+                headers={"Accept": "application/vnd.github+json"},
+                timeout=10,
+            )
+            repos = orjson.loads(r.content).get("items", [])
+            result = [
+                {
+                    "name": repo["full_name"],
+                    "description": repo.get("description", ""),
+                    "stars": repo["stargazers_count"],
+                    "url": repo["html_url"],
+                }
+                for repo in repos
+            ]
     except Exception as e:
         log.warning(f"GitHub trending取得失敗: {e}")
         return []
 
+    if result:
+        _write_cache(GH_CACHE_PATH, cache_key, result, GH_CACHE_TTL)
+    return result
+
+
+def get_async_http() -> httpx.AsyncClient:
+    """外部API用 AsyncClient を取得（実行中のイベントループ上で遅延生成）"""
+    global _async_http
+    if _async_http is None:
+        # HTTP/2 で HN の item 取得を1本の TLS 接続に多重化する。
+        # http1 は残し、ALPN で h2 を話せない相手には自動でフォールバックさせる
+        _async_http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=4),
+        )
+    return _async_http
+
 
-def observe(topics: str) -> dict:
+async def close_async_http() -> None:
+    """外部API用 AsyncClient を閉じる"""
+    global _async_http
+    if _async_http is not None:
+        await _async_http.aclose()
+        _async_http = None
+
+
+async def _collect_trends(topics: str) -> tuple[list[dict], list[dict]]:
+    """HN と GitHub を共有 AsyncClient で並行取得"""
+    http = get_async_http()
+    hn_stories, gh_repos = await asyncio.gather(
+        _fetch_hn_top_async(http, 10),
+        _fetch_github_trending_async(http, topics),
+    )
+    return hn_stories, gh_repos
+
+
+async def observe(topics: str) -> dict:
     """環境を観察してコンテキストを収集"""
     log.info("=== [observe] トレンド収集開始 ===")
-    hn_stories = fetch_hn_top(10)
-    gh_repos = fetch_github_trending(topics)
+    # HN と GitHub は独立した外部APIなので並行取得（待ち時間 = max(HN, GH)）
+    hn_stories, gh_repos = await _collect_trends(topics)
     context = {
         "date": date.today().isoformat(),
         "topics": topics,
         "hn_stories": hn_stories,
         "gh_repos": gh_repos,
+        # summarize / think / act で使うプロンプト断片はここで一度だけ組み立てる
+        "hn_prompt": format_hn_stories(hn_stories),
+        "hn_prompt_top": format_hn_stories(hn_stories[:ACT_HN_TOP_K]),
+        "gh_prompt": format_gh_repos(gh_repos),
     }
     log.info(f"HN: {len(hn_stories)}件, GitHub: {len(gh_repos)}件")
 
@@ -254,47 +931,99 @@ def observe(topics: str) -> dict:
     return context
 
 
-# ─── think ──────────────────────────────────────────────────────────────────
+SUMMARIZE_INSTRUCTIONS = """以下は本日の技術トレンドです。
+全体の傾向を日本語3行以内で要約してください（箇条書き不要、前置き不要）。"""
 
-def think(context: dict) -> str:
-    """テーマ選定: Ollama優先、Claude Haikuフォールバック（Issue #1）"""
-    if not count_action("think: テーマ選定"):
+_SUMMARIZE_TMPL = """Hacker News:
+{hn}
+
+GitHub:
+{gh}"""
+
+
+async def summarize_trends(context: dict) -> str:
+    """observe結果を Claude Haiku で要約（think と並行実行し、act の参考情報に使う）"""
+    if not count_action("observe: トレンド要約"):
+        return ""
+
+    trends = _SUMMARIZE_TMPL.format(
+        hn=context["hn_prompt"],
+        gh=context["gh_prompt"],
+    )
+    try:
+        resp = await _get_aclient().messages.create(
+            model="claude-haiku-4-5-20251001",
+            max_tokens=200,
+            system=cached_system(SUMMARIZE_INSTRUCTIONS),
+            messages=[{"role": "user", "content": trends}],
+        )
+        log_cache_usage(resp)
+        summary = "".join(b.text for b in resp.content if b.type == "text").strip()
+    except Exception as e:
+        log.warning(f"トレンド要約失敗: {e}")
         return ""
+    post_diary(f"トレンド要約\n{summary}", step="observe")
+    return summary
+
 
-    prompt = f"""今日のリサーチテーマを1つ選定してください。
+# ─── think ──────────────────────────────────────────────────────────────────
 
-対象トピック: {context['topics']}
-日付: {context['date']}
+THINK_INSTRUCTIONS = """今日のリサーチテーマを1つ選定してください。
+
+後述のトレンド情報を踏まえ、Zenn記事として最も価値が高いと思われるテーマを1行で答えてください。
+形式: 「テーマ: <テーマ名>（理由: <50字以内>）」"""
+
+_THINK_TMPL = """対象トピック: {topics}
+日付: {date}
 
 Hacker News トレンド:
-{json.dumps(context['hn_stories'], ensure_ascii=False, indent=2)}
+{hn}
 
 GitHub 注目リポジトリ:
-{json.dumps(context['gh_repos'], ensure_ascii=False, indent=2)}
+{gh}"""
 
-上記を踏まえ、Zenn記事として最も価値が高いと思われるテーマを1行で答えてください。
-形式: 「テーマ: <テーマ名>（理由: <50字以内>）」"""
+# Ollama用: 静的な指示を先頭に固定したテンプレート
+_THINK_OLLAMA_TMPL = THINK_INSTRUCTIONS + "\n\n{trends}"
 
-    # Ollama優先
-    if LocalLLM.is_available():
-        log.info(f"=== [think] テーマ選定 (ollama: {OLLAMA_MODEL}) ===")
-        try:
-            theme = LocalLLM.generate(prompt, max_tokens=200)
-            log.info(f"選定テーマ (Ollama): {theme}")
-            post_diary(f"{theme}", step="think")
-            return theme
-        except Exception as e:
-            log.warning(f"Ollama失敗、Claude Haikuにフォールバック: {e}")
 
-    # Claude Haiku フォールバック
-    log.info("=== [think] テーマ選定 (claude-haiku-4-5) ===")
-    resp = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=200,
-        messages=[{"role": "user", "content": prompt}],
+def think(context: dict) -> str:
+    """テーマ選定: Ollama優先、Claude Haikuフォールバック（Issue #1）"""
+    if not count_action("think: テーマ選定"):
+        return ""
+
+    trends = _THINK_TMPL.format(
+        topics=context["topics"],
+        date=context["date"],
+        hn=context["hn_prompt"],
+        gh=context["gh_prompt"],
     )
-    theme = resp.content[0].text.strip()
-    log.info(f"選定テーマ (Claude): {theme}")
+    prompt = _THINK_OLLAMA_TMPL.format(trends=trends)
+
+    def generate() -> str:
+        # Ollama優先
+        if LocalLLM.is_available():
+            log.info(f"=== [think] テーマ選定 (ollama: {OLLAMA_MODEL}) ===")
+            try:
+                theme = LocalLLM.generate(prompt, max_tokens=200)
+                log.info(f"選定テーマ (Ollama): {theme}")
+                return theme
+            except Exception as e:
+                log.warning(f"Ollama失敗、Claude Haikuにフォールバック: {e}")
+
+        # Claude Haiku フォールバック
+        log.info("=== [think] テーマ選定 (claude-haiku-4-5) ===")
+        theme = claude_generate(
+            batchable=True,
+            model="claude-haiku-4-5-20251001",
+            max_tokens=200,
+            system=cached_system(THINK_INSTRUCTIONS),
+            messages=[{"role": "user", "content": trends}],
+        )
+        log.info(f"選定テーマ (Claude): {theme}")
+        return theme
+
+    # 似たトレンド一覧で既に選定済みならその結果を再利用
+    theme = SEMCACHE.cached("think", trends, generate)
 
     # agent-diary: テーマ選定の思考プロセス
     post_diary(f"{theme}", step="think")
@@ -303,19 +1032,7 @@ GitHub 注目リポジトリ:
 
 # ─── act ────────────────────────────────────────────────────────────────────
 
-def act(theme: str, context: dict) -> str:
-    """Claude Sonnet で Zenn 記事草稿を生成"""
-    if not theme or not count_action("act: 記事草稿生成"):
-        return ""
-
-    log.info("=== [act] 記事草稿生成 (claude-sonnet-4-6) ===")
-    prompt = f"""以下のテーマでZenn技術記事の草稿を生成してください。
-
-テーマ: {theme}
-日付: {context['date']}
-
-参考情報:
-{json.dumps(context['hn_stories'][:5], ensure_ascii=False, indent=2)}
+ACT_INSTRUCTIONS = """指定されたテーマでZenn技術記事の草稿を生成してください。
 
 要件:
 - Zennのmarkdown形式（frontmatter付き）
@@ -326,82 +1043,161 @@ def act(theme: str, context: dict) -> str:
 
 frontmatterのtopicsは実際のZennタグ名（英小文字）を使うこと。"""
 
-    resp = client.messages.create(
-        model="claude-sonnet-4-6",
+_ACT_TMPL = """テーマ: {theme}
+日付: {date}
+
+本日のトレンド傾向:
+{summary}
+
+参考情報:
+{hn}"""
+
+
+def act(theme: str, context: dict) -> str:
+    """Claude Sonnet で Zenn 記事草稿を生成"""
+    if not theme or not count_action("act: 記事草稿生成"):
+        return ""
+
+    model = pick_writer_model(theme, load_last_score())
+    log.info(f"=== [act] 記事草稿生成 ({model}) ===")
+    request = _ACT_TMPL.format(
+        theme=theme,
+        date=context["date"],
+        summary=context.get("trend_summary") or "（なし）",
+        hn=context["hn_prompt_top"],
+    )
+
+    draft = claude_generate(
+        batchable=True,
+        model=model,
         max_tokens=4096,
-        messages=[{"role": "user", "content": prompt}],
+        system=cached_system(ACT_INSTRUCTIONS),
+        messages=[{"role": "user", "content": request}],
     )
-    draft = resp.content[0].text.strip()
     log.info(f"草稿生成完了: {len(draft)}文字")
     return draft
 
 
 # ─── reflect ────────────────────────────────────────────────────────────────
 
-def reflect(draft: str, theme: str) -> dict:
-    """草稿の品質を自己評価: Ollama優先、Claude Haikuフォールバック（Issue #1）"""
-    if not draft or not count_action("reflect: 自己評価"):
-        return {"score": 0, "comment": "スキップ"}
+REFLECT_RUBRIC = """後述のZenn記事草稿を評価してください。
 
-    # Ollama用は短縮版（500字）、Claude用はフル版（2000字）
-    draft_short = draft[:500]
-    draft_full  = draft[:2000]
+以下の観点で100点満点で採点し、score ツールで返してください:
+- coherence: 論理的一貫性（0-30）
+- originality: 独自性・新規性（0-30）
+- readability: 読みやすさ（0-20）
+- accuracy: 技術的正確性（0-20）
+- total: 合計点（0-100）
+- comment: 一言コメント"""
+
+# 自己評価の構造化出力スキーマ（Claude tool use / Ollama format で共通）
+REFLECT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "coherence":   {"type": "integer", "minimum": 0, "maximum": 30},
+        "originality": {"type": "integer", "minimum": 0, "maximum": 30},
+        "readability": {"type": "integer", "minimum": 0, "maximum": 20},
+        "accuracy":    {"type": "integer", "minimum": 0, "maximum": 20},
+        "total":       {"type": "integer", "minimum": 0, "maximum": 100},
+        "comment":     {"type": "string"},
+    },
+    "required": ["coherence", "originality", "readability", "accuracy", "total", "comment"],
+}
 
-    prompt_ollama = f"""以下のZenn記事草稿を評価してください。
+# Ollama用: 静的な評価指示を先頭に固定し、テーマ・草稿は末尾に付ける。
+# プレフィックスが毎回バイト一致するため Ollama のKVキャッシュ（プロンプト処理）が再利用される
+_REFLECT_PREFIX_OLLAMA = """後述のZenn記事草稿を評価してください。
 
-テーマ: {theme}
+以下の観点で100点満点で採点し、JSON形式のみで返してください:
+形式: {"coherence": N, "originality": N, "readability": N, "accuracy": N, "total": N, "comment": "一言コメント"}
+
+"""
+
+# テーマ・草稿の動的部分（Ollama/Claude 共通。Claude は REFLECT_RUBRIC を system に置く）
+_REFLECT_DRAFT_TMPL = """テーマ: {theme}
 
 ---
-{draft_short}
----
+{draft}
+---"""
 
-以下の観点で100点満点で採点し、JSON形式のみで返してください:
-形式: {{"coherence": N, "originality": N, "readability": N, "accuracy": N, "total": N, "comment": "一言コメント"}}"""
+REFLECT_TOOL = {
+    "name": "score",
+    "description": "Zenn記事草稿の評価結果を記録する",
+    "input_schema": REFLECT_SCHEMA,
+}
 
-    prompt_claude = f"""以下のZenn記事草稿を評価してください。
 
-テーマ: {theme}
+_JSON_DECODER = json.JSONDecoder()
 
----
-{draft_full}
----
 
-以下の観点で100点満点で採点し、JSON形式で返してください:
-- coherence: 論理的一貫性（0-30）
-- originality: 独自性・新規性（0-30）
-- readability: 読みやすさ（0-20）
-- accuracy: 技術的正確性（0-20）
+def _extract_json(text: str) -> dict:
+    """LLM応答からJSONオブジェクトを取り出す
+
+    通常は応答全体がJSON（構造化出力）なので orjson で一発で読む。前後に文章や
+    コードフェンスが混ざった場合は "{" の位置から raw_decode で最初の完全な
+    オブジェクトだけを読む（入れ子・末尾の文章に強い）。
+    """
+    try:
+        obj = orjson.loads(text)
+        if isinstance(obj, dict):
+            return obj
+    except orjson.JSONDecodeError:
+        pass
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+        start = text.find("{", start + 1)
+    raise ValueError(f"JSONオブジェクトが見つかりません: {text[:100]}")
+
+
+def reflect(draft: str, theme: str) -> dict:
+    """草稿の品質を自己評価: Ollama優先、Claude Haikuフォールバック（Issue #1）
+
+    どちらも構造化出力（Ollama: format スキーマ / Claude: tool use）で受け取り、
+    応答テキストからのJSON切り出しは行わない。
+    """
+    if not draft or not count_action("reflect: 自己評価"):
+        return {"score": 0, "comment": "スキップ"}
 
-形式: {{"coherence": N, "originality": N, "readability": N, "accuracy": N, "total": N, "comment": "一言コメント"}}"""
+    # Ollama用は短縮版（500字）、Claude用はフル版（2000字）
+    draft_short = draft[:500]
+    draft_full  = draft[:2000]
 
-    text = ""
+    prompt_ollama = _REFLECT_PREFIX_OLLAMA + _REFLECT_DRAFT_TMPL.format(theme=theme, draft=draft_short)
+    draft_claude = _REFLECT_DRAFT_TMPL.format(theme=theme, draft=draft_full)
+
+    result = None
     # Ollama優先（短縮プロンプトで高速評価）
     if LocalLLM.is_available():
         log.info(f"=== [reflect] 自己評価 (ollama: {OLLAMA_MODEL}) ===")
         try:
-            text = LocalLLM.generate(prompt_ollama, max_tokens=150)
+            text = LocalLLM.generate(prompt_ollama, max_tokens=150, format=REFLECT_SCHEMA)
             log.info(f"自己評価応答 (Ollama): {text[:100]}")
+            result = _extract_json(text)
         except Exception as e:
             log.warning(f"Ollama失敗、Claude Haikuにフォールバック: {e}")
-            text = ""
+            result = None
 
     # Claude Haiku フォールバック
-    if not text:
+    if not isinstance(result, dict):
         log.info("=== [reflect] 自己評価 (claude-haiku-4-5) ===")
-        resp = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=300,
-            messages=[{"role": "user", "content": prompt_claude}],
-        )
-        text = resp.content[0].text.strip()
-
-    try:
-        # JSONブロックを抽出
-        start = text.find("{")
-        end = text.rfind("}") + 1
-        result = json.loads(text[start:end])
-    except Exception:
-        result = {"total": 0, "comment": "評価パース失敗", "raw": text}
+        try:
+            result = claude_tool_call(
+                REFLECT_TOOL,
+                batchable=True,
+                model="claude-haiku-4-5-20251001",
+                max_tokens=300,
+                system=cached_system(REFLECT_RUBRIC),
+                messages=[{"role": "user", "content": draft_claude}],
+            )
+        except Exception as e:
+            log.warning(f"Claude自己評価失敗: {e}")
+            result = {"total": 0, "comment": "評価失敗"}
     log.info(f"自己評価: {result}")
 
     # agent-diary: 内省ログ
@@ -467,7 +1263,9 @@ def judge_importance(sender: str, message: str, response: str) -> float:
 
 重要度（1〜10の整数のみ）:"""
     try:
-        score_text = LocalLLM.generate(prompt, max_tokens=5)
+        score_text = SEMCACHE.cached(
+            "judge_importance", prompt, lambda: LocalLLM.generate(prompt, max_tokens=5)
+        )
         return min(10.0, max(1.0, float(score_text.strip()[:3])))
     except Exception:
         return 5.0
@@ -480,8 +1278,7 @@ def chat_handler(message: str, sender: str, reply_channel_id: str) -> None:
     # RAGコンテキスト取得（Issue #34: ChromaDB検索で応答強化）
     rag_context = ""
     try:
-        from memory_manager import MemoryManager
-        mm = MemoryManager()
+        mm = _get_mm()
         rag_results = mm.search_context(message, n_results=3)
         if rag_results:
             rag_context = "\n\n## 関連する過去の記憶・知識\n"
@@ -499,60 +1296,59 @@ def chat_handler(message: str, sender: str, reply_channel_id: str) -> None:
         "日本語で簡潔かつ的確に回答してください。"
     )
 
+    posted = False  # 返信の一部を既に送信したか
+    tail = ""       # ストリーミング時の未送信分
     try:
         if LocalLLM.is_available():
-            resp = httpx.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={
-                    "model": OLLAMA_MODEL_CHAT,
-                    "system": system_prompt,
-                    "prompt": prompt,
-                    "stream": False,
-                    "think": False,
-                    "options": {"num_predict": 800, "temperature": 0.7},
-                },
-                timeout=120,
-            )
-            resp.raise_for_status()
-            response = resp.json()["response"].strip()
             llm_label = OLLAMA_MODEL_CHAT
+            parts: list[str] = []
+            buf = ""
+            for chunk in LocalLLM.stream(prompt, max_tokens=800, model=OLLAMA_MODEL_CHAT, system=system_prompt):
+                parts.append(chunk)
+                buf += chunk
+                # 段落の区切りで一定量溜まったら先に送る（最初の返信までの待ち時間を短縮）
+                if len(buf) >= CHAT_STREAM_FLUSH_CHARS and "\n\n" in buf:
+                    head, buf = buf.rsplit("\n\n", 1)
+                    head = head.strip()
+                    if head:
+                        send_discord(
+                            reply_channel_id,
+                            head if posted else f"💬 [{llm_label}] {head}",
+                            label="chat_handler Discord返信",
+                        )
+                        posted = True
+            response = "".join(parts).strip()
+            tail = buf.strip()
         else:
             # Claude Haiku フォールバック（RAGコンテキスト付き）
-            resp = client.messages.create(
+            response = claude_generate(
                 model="claude-haiku-4-5-20251001",
                 max_tokens=800,
                 system=system_prompt,
                 messages=[{"role": "user", "content": prompt}],
             )
-            response = resp.content[0].text.strip()
             llm_label = "Claude Haiku (fallback)"
     except Exception as e:
         log.error(f"chat_handler LLM error: {e}")
         response = f"⚠️ エラーが発生しました: {e}"
-        llm_label = "error"
-
-    # agent-chat チャンネルに返信
-    try:
-        httpx.post(
-            f"{HUB_API_URL}/api/v1/discord/reply",
-            json={
-                "channel_id": reply_channel_id,
-                "message": f"💬 [{llm_label}] {response}",
-                "sender_name": AGENT_NAME,
-            },
-            timeout=10,
-        )
-    except Exception as e:
-        log.warning(f"chat_handler Discord返信失敗: {e}")
+        tail = response
+        if not posted:
+            llm_label = "error"
+
+    # agent-chat チャンネルに返信（ストリーミングで一部送信済みなら残りのみ）
+    if posted:
+        if tail:
+            send_discord(reply_channel_id, tail, label="chat_handler Discord返信")
+    else:
+        send_discord(reply_channel_id, f"💬 [{llm_label}] {response}", label="chat_handler Discord返信")
 
     post_diary(f"**{sender}**: {message[:100]}\n→ {response[:200]}", step="think")
 
     # MemoryManager: importance自動判定してChromaDB保存
     try:
-        from memory_manager import MemoryManager
         importance = judge_importance(sender, message, response)
         log.info(f"chat importance: {importance}")
-        mm = MemoryManager()
+        mm = _get_mm()
         saved = mm.add_chat(sender=sender, message=message, response=response, importance=importance)
         if saved:
             log.info(f"chat saved to agent_memory (importance={importance})")
@@ -560,6 +1356,31 @@ def chat_handler(message: str, sender: str, reply_channel_id: str) -> None:
         log.warning(f"memory_manager.add_chat失敗: {e}")
 
 
+# チャット処理はメインのイベントループに投入し、同時実行数をセマフォで制限する
+# （リクエストごとにスレッドを立てない）
+CHAT_MAX_CONCURRENCY = 2
+CHAT_STREAM_FLUSH_CHARS = 200  # ストリーミング応答をこの文字数以上・段落区切りで分割送信
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+_chat_sem: Optional[asyncio.Semaphore] = None
+
+
+async def _run_chat_job(fn, *args) -> None:
+    async with _chat_sem:
+        await asyncio.to_thread(fn, *args)
+
+
+def dispatch_chat(fn, *args) -> None:
+    """任意のスレッドからチャット処理 fn(*args) をメインループに投入（即座に戻る）
+
+    メインループ未起動時は従来通り専用スレッドで実行する。
+    """
+    loop = _main_loop
+    if loop is None or loop.is_closed():
+        threading.Thread(target=fn, args=args, daemon=True).start()
+        return
+    asyncio.run_coroutine_threadsafe(_run_chat_job(fn, *args), loop)
+
+
 class ChatHTTPHandler(BaseHTTPRequestHandler):
     """POST /chat を受け付けてchat_handlerに委譲するHTTPハンドラ（Issue #31）"""
 
@@ -569,99 +1390,186 @@ class ChatHTTPHandler(BaseHTTPRequestHandler):
             self.end_headers()
             return
         length = int(self.headers.get("Content-Length", 0))
-        body = json.loads(self.rfile.read(length))
+        body = orjson.loads(self.rfile.read(length))
         sender = body.get("sender", "Admin")
         content = body.get("content", "")
         channel_id = body.get("channel_id", CHAT_CHANNEL)
         self.send_response(200)
         self.end_headers()
         self.wfile.write(b"ok")
-        # 別スレッドで処理（レスポンスを即返す）
-        threading.Thread(target=chat_handler, args=(content, sender, channel_id), daemon=True).start()
+        # メインループに投入して処理（レスポンスを即返す）
+        dispatch_chat(chat_handler, content, sender, channel_id)
 
     def log_message(self, format, *args):
         log.debug(f"ChatHTTP: {format % args}")
 
 
 def start_chat_http_server():
-    """チャットHTTPサーバーをデーモンスレッドで起動"""
-    server = HTTPServer(("localhost", AGENT_CHAT_PORT), ChatHTTPHandler)
+    """チャットHTTPサーバーをデーモンスレッドで起動（リクエストごとにスレッドで受け付け）"""
+    server = ThreadingHTTPServer(("localhost", AGENT_CHAT_PORT), ChatHTTPHandler)
+    server.daemon_threads = True
     log.info(f"Chat HTTP server listening on localhost:{AGENT_CHAT_PORT}")
     t = threading.Thread(target=server.serve_forever, daemon=True)
     t.start()
     return server
 
 
+def _process_chat_file(fpath: str) -> None:
+    """agent-chat メッセージファイルを1件処理して削除
+
+    ファイル監視とポーリングの両方から呼ばれるため、処理前に rename で
+    ファイルを確保し、同じメッセージを二重に処理しないようにする。
+    """
+    claimed = fpath + ".processing"
+    try:
+        os.rename(fpath, claimed)
+    except OSError:
+        return  # 他の経路で処理済み・処理中
+
+    try:
+        with open(claimed, "rb") as f:
+            data = orjson.loads(f.read())
+        sender     = data.get("sender", "Admin")
+        content    = data.get("content", "")
+        channel_id = data.get("channel_id", CHAT_CHANNEL)
+
+        if content:
+            chat_handler(content, sender, channel_id)
+    except Exception as e:
+        log.error(f"chat file error ({fpath}): {e}")
+    finally:
+        try:
+            os.remove(claimed)   # 壊れたファイルも削除して進む
+        except Exception:
+            pass
+
+
+def _is_chat_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return name.startswith("chat-") and name.endswith(".json")
+
+
+def start_chat_watcher():
+    """agent-chat ディレクトリを watchdog で監視し、書き込み完了したファイルを即時処理
+
+    watchdog 未インストール時は None を返す（ポーリングのみで動作）。
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        log.info("watchdog 未インストール: agent-chat はポーリングのみで受信します")
+        return None
+
+    class ChatFileHandler(FileSystemEventHandler):
+        # on_created は書き込み途中で発火し得るため、close 完了 / rename 先で処理する
+        def on_closed(self, event):
+            if not event.is_directory and _is_chat_file(event.src_path):
+                self._dispatch_file(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory and _is_chat_file(event.dest_path):
+                self._dispatch_file(event.dest_path)
+
+        @staticmethod
+        def _dispatch_file(path: str) -> None:
+            # chat_handler はLLM呼び出しでブロックするので監視スレッドから切り離す
+            dispatch_chat(_process_chat_file, path)
+
+    os.makedirs(AGENT_CHAT_DIR, exist_ok=True)
+    observer = Observer()
+    observer.schedule(ChatFileHandler(), AGENT_CHAT_DIR, recursive=False)
+    observer.daemon = True
+    observer.start()
+    log.info(f"agent-chat 監視開始: {AGENT_CHAT_DIR}")
+    return observer
+
+
+def _chat_dir_has_messages() -> bool:
+    """agent-chat ディレクトリに未処理メッセージが1件でもあるか（最初の1件で打ち切る）"""
+    try:
+        with os.scandir(AGENT_CHAT_DIR) as it:
+            return any(entry.is_file() and _is_chat_file(entry.name) for entry in it)
+    except FileNotFoundError:
+        return False
+
+
 def poll_chat_messages() -> None:
-    """agent-chat ディレクトリの未処理メッセージを処理する（APScheduler定期ジョブ）"""
-    if not os.path.isdir(AGENT_CHAT_DIR):
-        return
+    """agent-chat ディレクトリの未処理メッセージを処理する（APScheduler定期ジョブ）
 
-    files = sorted(glob.glob(f"{AGENT_CHAT_DIR}/chat-*.json"))
+    非推奨のファイル IPC 向けの移行期間フォールバック。ディレクトリが無い・空なら
+    何もしない。watchdog 稼働時は取りこぼし回収用のジャニターとして低頻度で実行される。
+    """
+    if not _chat_dir_has_messages():
+        return
+    try:
+        with os.scandir(AGENT_CHAT_DIR) as it:
+            files = sorted(
+                entry.path for entry in it
+                if entry.is_file() and _is_chat_file(entry.name)
+            )
+    except FileNotFoundError:
+        return
     if not files:
         return
 
     log.info(f"💬 chat poll: {len(files)} 件のメッセージ")
     for fpath in files:
-        try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            sender     = data.get("sender", "Admin")
-            content    = data.get("content", "")
-            channel_id = data.get("channel_id", CHAT_CHANNEL)
-
-            if content:
-                chat_handler(content, sender, channel_id)
-
-            os.remove(fpath)
-        except Exception as e:
-            log.error(f"chat poll error ({fpath}): {e}")
-            try:
-                os.remove(fpath)   # 壊れたファイルは削除して進む
-            except Exception:
-                pass
+        _process_chat_file(fpath)
 
 
 # ─── メインタスク ────────────────────────────────────────────────────────────
 
-def daily_research():
-    """毎朝08:00に実行されるメインタスク。
-    全体をtry/exceptで囲み、未処理例外によるスレッドプール崩壊を防止。"""
-    global action_count
+async def daily_research():
+    """毎朝08:00に実行されるメインタスク（イベントループ上のコルーチン）。
+    ブロッキングなLLM呼び出し・git操作は asyncio.to_thread で逃がす。
+    全体をtry/exceptで囲み、未処理例外によるスケジューラ停止を防止。"""
     try:
-        action_count = 0  # 日次リセット
-
         today = date.today().isoformat()
         topics = get_today_topics()
         log.info(f"=== 毎朝リサーチ開始: {today} / テーマ: {topics} ===")
         notify_discord(f"🌅 毎朝リサーチ開始\n日付: {today}\nトピック: {topics}")
 
         # observe
-        context = observe(topics)
+        context = await observe(topics)
 
-        # think
-        theme = think(context)
+        # think（Haikuによるトレンド要約は独立しているので並行実行し、待ち時間を隠す。
+        # 要約は act の参考情報として草稿に渡す）
+        summary_task = asyncio.create_task(summarize_trends(context))
+        theme = None
+        try:
+            theme = await asyncio.to_thread(think, context)
+        finally:
+            if theme is None:
+                summary_task.cancel()  # think が例外で抜けた場合に要約を放置しない
+        context["trend_summary"] = await summary_task
         if not theme:
             notify_discord("⚠️ テーマ選定に失敗しました。本日の処理を中断します。", is_alert=True)
             return
 
         # act
-        draft = act(theme, context)
+        draft = await asyncio.to_thread(act, theme, context)
         if not draft:
             notify_discord("⚠️ 記事草稿生成に失敗しました。", is_alert=True)
             return
 
         # reflect
-        evaluation = reflect(draft, theme)
+        evaluation = await asyncio.to_thread(reflect, draft, theme)
 
         # MemoryManager: リサーチログを蓄積
         score = evaluation.get("total", "?")
+        if isinstance(score, (int, float)):
+            save_last_score(score)
         try:
-            from memory_manager import MemoryManager
-            mm = MemoryManager()
+            mm = _get_mm()
             # reflect scoreをimportanceに変換（100点満点→10点満点）
             importance = min(10.0, max(1.0, score / 10.0)) if isinstance(score, (int, float)) else 5.0
-            mm.add_research(date=today, topic=topics, theme=theme, score=score if isinstance(score, (int, float)) else 0, summary=evaluation.get("comment", ""))
+            await asyncio.to_thread(
+                mm.add_research,
+                date=today, topic=topics, theme=theme,
+                score=score if isinstance(score, (int, float)) else 0,
+                summary=evaluation.get("comment", ""),
+            )
         except Exception as e:
             log.warning(f"memory_manager.add_research失敗: {e}")
 
@@ -670,7 +1578,7 @@ def daily_research():
             zenn_today = datetime.now(JST).strftime("%Y-%m-%d")
             zenn_slug = re.sub(r"[^\w\-]", "-", theme.lower())[:20].strip("-")
             zenn_filename = f"{zenn_today}-{zenn_slug}.md"
-            if commit_draft_to_zenn(draft, theme, int(score)):
+            if await asyncio.to_thread(commit_draft_to_zenn, draft, theme, int(score)):
                 github_url = f"https://github.com/claude-max-agent/zenn-content/blob/main/articles/{zenn_filename}"
                 notify_discord(f"📝 Zenn草稿をコミットしました\n{github_url}")
             else:
@@ -710,9 +1618,8 @@ def daily_research():
 
 def weekly_memory_cleanup():
     """週次メモリクリーンアップ: TTL切れ削除 + Ollama要約生成"""
-    from memory_manager import MemoryManager
     try:
-        mm = MemoryManager()
+        mm = _get_mm()
         mm.cleanup()
         mm.summarize_week()
         log.info("週次メモリクリーンアップ完了")
@@ -728,12 +1635,23 @@ def scheduler_heartbeat():
 
 # ─── エントリポイント ────────────────────────────────────────────────────────
 
-if __name__ == "__main__":
+async def main() -> None:
+    # APScheduler は常駐モードでのみ必要なので --once 実行時は読み込まない
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.executors.asyncio import AsyncIOExecutor
+    from apscheduler.executors.pool import ThreadPoolExecutor
+
+    global _main_loop, _chat_sem
+    _main_loop = asyncio.get_running_loop()
+    _chat_sem = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
+
     log.info("autonomous_agent 起動")
 
     # Ollama可用性チェック（Issue #1）
     if LocalLLM.is_available():
         log.info(f"✅ Ollama 利用可能: {OLLAMA_URL} / モデル: {OLLAMA_MODEL}")
+        # モデルのロードには数秒かかるので起動処理を止めずにバックグラウンドで事前ロード
+        threading.Thread(target=LocalLLM.warm_up, name="ollama-warmup", daemon=True).start()
         llm_status = f"🧠 LLM: Ollama ({OLLAMA_MODEL}) + Claude Sonnet (ハイブリッド)"
         post_diary(f"Ollama ({OLLAMA_MODEL}) が利用可能です。ローカルLLMで軽量タスクを実行します。", step="startup")
     else:
@@ -744,22 +1662,28 @@ if __name__ == "__main__":
     # スケジュール設定: INTERVAL_MINUTES 環境変数が設定されていればインターバル実行
     interval_minutes = os.getenv("INTERVAL_MINUTES")
 
-    # APScheduler: 明示的なExecutor設定でスレッドプール崩壊を防止
+    # APScheduler: コルーチンジョブ（daily_research）はイベントループ上で実行し、
+    # 同期ジョブは明示的なスレッドプールに載せてプール崩壊を防止
     executors = {
-        "default": ThreadPoolExecutor(max_workers=10),
+        "default": AsyncIOExecutor(),
+        "threadpool": ThreadPoolExecutor(max_workers=10),
     }
     job_defaults = {
         "coalesce": True,          # 複数misfireを1回に統合
         "max_instances": 1,         # 同一ジョブの同時実行防止
         "misfire_grace_time": 300,  # 5分以内のmisfireは実行を許可
     }
-    scheduler = BlockingScheduler(
+    scheduler = AsyncIOScheduler(
         timezone="Asia/Tokyo",
         executors=executors,
         job_defaults=job_defaults,
     )
 
-    if interval_minutes:
+    if not SCHEDULE_DAILY_RESEARCH:
+        # systemd timer 等の外部スケジューラが --once で起動する構成。常駐側はチャット等のみ担当
+        schedule_desc = "⏰ 外部タイマー（--once）"
+        log.info("daily_research のスケジュール登録をスキップ（SCHEDULE_DAILY_RESEARCH=0）")
+    elif interval_minutes:
         interval_minutes = int(interval_minutes)
         scheduler.add_job(
             daily_research,
@@ -782,15 +1706,26 @@ if __name__ == "__main__":
         schedule_desc = "📅 毎朝 08:00 JST"
         log.info("スケジューラ起動: 毎朝 08:00 JST")
 
-    # agent-chat ポーリング: 30秒ごとに未処理メッセージをチェック（Issue #18）
-    scheduler.add_job(
-        poll_chat_messages,
-        trigger="interval",
-        seconds=30,
-        id="poll_chat",
-        name="agent-chat ポーリング",
-    )
-    log.info("agent-chat ポーリング: 30秒間隔で起動")
+    # agent-chat: 本流は Chat API（/chat）。非推奨のファイル IPC は移行期間中のみ受け付け、
+    # watchdog があればイベント駆動で即時処理し、ポーリングは5分ごとの取りこぼし回収のみ。
+    # なければ30秒ごとに未処理メッセージをチェック（Issue #18）
+    chat_watcher = None
+    if AGENT_CHAT_FILE_IPC:
+        chat_watcher = start_chat_watcher()
+        poll_seconds = 300 if chat_watcher else 30
+        chat_desc = "Chat API / ファイル監視で即時" if chat_watcher else "Chat API で即時（ファイルは30秒ポーリング）"
+        scheduler.add_job(
+            poll_chat_messages,
+            trigger="interval",
+            seconds=poll_seconds,
+            id="poll_chat",
+            name="agent-chat ポーリング（非推奨ファイル IPC）",
+            executor="threadpool",
+        )
+        log.info(f"agent-chat ポーリング: {poll_seconds}秒間隔で起動（ファイル IPC は非推奨）")
+    else:
+        chat_desc = "Chat API で即時"
+        log.info("agent-chat ファイル IPC 無効: Chat API のみで受信します")
 
     # 週次メモリクリーンアップ: 毎週日曜03:00 JST
     scheduler.add_job(
@@ -801,6 +1736,7 @@ if __name__ == "__main__":
         minute=0,
         id="memory_cleanup",
         name="週次メモリクリーンアップ",
+        executor="threadpool",
     )
     log.info("週次メモリクリーンアップ: 毎週日曜 03:00 JST")
 
@@ -811,6 +1747,7 @@ if __name__ == "__main__":
         minutes=5,
         id="heartbeat",
         name="スケジューラ heartbeat",
+        executor="threadpool",
     )
     log.info("heartbeat: 5分間隔で起動")
 
@@ -818,24 +1755,51 @@ if __name__ == "__main__":
     start_chat_http_server()
     log.info(f"チャットAPIサーバー起動: localhost:{AGENT_CHAT_PORT}")
 
-    notify_discord(f"🤖 autonomous_agent が起動しました。{schedule_desc} にリサーチを実行します。\n{llm_status}\n💬 agent-chat: 30秒ポーリングで対話受付中\n🌐 Chat API: localhost:{AGENT_CHAT_PORT}")
+    notify_discord(f"🤖 autonomous_agent が起動しました。{schedule_desc} にリサーチを実行します。\n{llm_status}\n💬 agent-chat: {chat_desc}対話受付中\n🌐 Chat API: localhost:{AGENT_CHAT_PORT}")
     post_diary("起動しました。思考ログをここに記録していきます。", step="startup")
 
     # 起動時に即時実行するオプション（テスト用）
     if os.getenv("RUN_NOW") == "1":
         log.info("RUN_NOW=1 検出: 即時実行します")
-        daily_research()
+        await daily_research()
 
     # シグナルハンドラ: graceful shutdown
-    def handle_signal(signum, frame):
+    stop_event = asyncio.Event()
+
+    def handle_signal(signum):
         log.info(f"シグナル {signum} 受信、スケジューラ停止中...")
+        stop_event.set()
+
+    _main_loop.add_signal_handler(signal.SIGTERM, handle_signal, signal.SIGTERM)
+
+    scheduler.start()
+    try:
+        await stop_event.wait()
+    finally:
         scheduler.shutdown(wait=False)
+        if chat_watcher:
+            chat_watcher.stop()
+        await close_async_http()
+
 
-    signal.signal(signal.SIGTERM, handle_signal)
+async def run_once() -> None:
+    """daily_research を1回だけ実行して終了（systemd timer からの起動用）"""
+    try:
+        await daily_research()
+    finally:
+        await close_async_http()
+        flush_discord()
+
+
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        asyncio.run(run_once())
+        sys.exit(0)
 
     try:
-        scheduler.start()
+        asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
         log.info("autonomous_agent 停止")
         notify_discord("🛑 autonomous_agent が停止しました。")
         post_diary("停止します。またね。", step="startup")
+        flush_discord()
@@ -17,19 +17,24 @@ ChromaDB（personal_private コレクション）に格納する。
 """
 
 import argparse
-import json
+import hashlib
+import itertools
 import logging
+import os
 import shutil
 import sqlite3
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import orjson
 
 # プロジェクトルートを sys.path に追加
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
-from rag.pii_filter import filter_urls, mask_pii
+from rag.pii_filter import mask_pii, sensitive_url_flags
 from rag.vector_store import VectorStore, COLLECTION_PRIVATE
 
 log = logging.getLogger(__name__)
@@ -37,7 +42,8 @@ log = logging.getLogger(__name__)
 DATA_DIR   = PROJECT_ROOT / "data"
 RAW_DIR    = DATA_DIR / "raw" / "chrome"
 PROC_DIR   = DATA_DIR / "processed" / "chrome"
-CHROME_EPOCH = datetime(1601, 1, 1)
+# Chrome の時刻は 1601-01-01 起点のマイクロ秒。UNIX エポックとの差（秒）
+CHROME_EPOCH_OFFSET = 11644473600
 
 # 除外するURLプレフィックス（拡張子・内部ページ等）
 SKIP_URL_PREFIXES = [
@@ -48,58 +54,103 @@ SKIP_URL_PREFIXES = [
 # 2回以上訪問した URL のみ取り込む（ノイズ削減）
 MIN_VISIT_COUNT = 2
 
+FETCH_SIZE = 500  # load_history が1回の fetchmany で取り出す行数
+MAX_IMPORT_WORKERS = 4  # --all 時にデバイスを並列処理するプロセス数
 
-def load_history(db_path: Path, limit: int = 5000) -> list[dict]:
-    """Chrome History SQLite から訪問履歴を読み込む"""
-    # ロック回避のため一時コピー
-    tmp = Path("/tmp/chrome_history_import.db")
-    shutil.copy(db_path, tmp)
-
-    conn = sqlite3.connect(tmp)
-    cur  = conn.cursor()
 
-    cur.execute("""
-        SELECT url, title, visit_count, last_visit_time
+def _connect_readonly(db_path: Path) -> sqlite3.Connection:
+    """History をコピーせず読み取り専用で開く（immutable でロックを取らない）"""
+    uri = f"{db_path.resolve().as_uri()}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256MB: 読み込みを OS のページキャッシュに任せる
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def load_history(db_path: Path, limit: int = 5000) -> Iterator[dict]:
+    """Chrome History SQLite から訪問履歴を1件ずつ読み込む（fetchmany で少しずつ取り出す）"""
+    # http(s) 以外・内部ページは SQL 側で除外し、LIMIT も取り込み対象の行だけに効かせる
+    skip_clause = "".join("\n          AND url NOT LIKE ?" for _ in SKIP_URL_PREFIXES)
+    # last_visit は SQLite 側で ISO 文字列に変換する（行ごとの datetime 演算を Python でしない）。
+    # 書式は datetime.isoformat() と同じ（マイクロ秒が 0 でなければ .ffffff を付ける）
+    query = f"""
+        SELECT url, title, visit_count,
+               strftime('%Y-%m-%dT%H:%M:%S', last_visit_time / 1000000 - {CHROME_EPOCH_OFFSET}, 'unixepoch')
+                 || CASE WHEN last_visit_time % 1000000 THEN printf('.%06d', last_visit_time % 1000000) ELSE '' END
         FROM urls
         WHERE visit_count >= ?
+          AND (url LIKE 'http://%' OR url LIKE 'https://%'){skip_clause}
         ORDER BY visit_count DESC
         LIMIT ?
-    """, (MIN_VISIT_COUNT, limit))
-
-    rows = []
-    for url, title, count, ts in cur.fetchall():
-        last_visit = CHROME_EPOCH + timedelta(microseconds=ts)
-        rows.append({
-            "url":          url,
-            "title":        title or "",
-            "visit_count":  count,
-            "last_visit":   last_visit.isoformat(),
-        })
-
-    conn.close()
-    tmp.unlink(missing_ok=True)
-    return rows
-
-
-def clean_entries(entries: list[dict]) -> list[dict]:
-    """不要なエントリを除去・PIIをマスク"""
-    cleaned = []
-    for e in entries:
-        url = e["url"]
-
-        # スキップ対象
-        if any(url.startswith(p) for p in SKIP_URL_PREFIXES):
-            continue
-        if not url.startswith(("http://", "https://")):
-            continue
+    """
+    params = (MIN_VISIT_COUNT, *(p + "%" for p in SKIP_URL_PREFIXES), limit)
+    tmp = None
+    conn = None
+    try:
+        conn = _connect_readonly(db_path)
+        cur = conn.execute(query, params)
+    except sqlite3.OperationalError as e:
+        # 接続後のクエリで失敗した場合は、一時コピーに切り替える前に閉じる
+        if conn is not None:
+            conn.close()
+        # Chrome が排他ロック中などで開けない場合は従来通り一時コピーから読む
+        log.warning(f"History 直接読み込み失敗、一時コピーから読み込みます: {e}")
+        # --all の並列ワーカー同士で衝突しないようプロセスごとのファイル名にする
+        tmp = Path(f"/tmp/chrome_history_import_{os.getpid()}.db")
+        shutil.copy(db_path, tmp)
+        conn = sqlite3.connect(tmp)
+        cur = conn.execute(query, params)
+
+    count = 0
+    try:
+        cur.arraysize = FETCH_SIZE
+        while rows := cur.fetchmany():
+            for url, title, visits, last_visit in rows:
+                count += 1
+                yield {
+                    "url":          url,
+                    "title":        title or "",
+                    "visit_count":  visits,
+                    "last_visit":   last_visit,
+                }
+    finally:
+        conn.close()
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+    log.info(f"Raw entries: {count}")
+
+
+def clean_entries(entries: Iterable[dict]) -> list[dict]:
+    """不要なエントリを除去・PIIをマスク（スキーム・内部ページの除外は load_history の SQL で済んでいる）
+
+    入力は FETCH_SIZE 件ずつ取り出し、センシティブURLの判定をその単位でまとめて行う
+    （hyperscan があれば1回のスキャン）。入力全体をリストに溜めない。
+    """
+    cleaned, removed = [], 0
+    it = iter(entries)
+    while batch := list(itertools.islice(it, FETCH_SIZE)):
+        sensitive = sensitive_url_flags([e["url"] for e in batch])
+        for e, is_sensitive in zip(batch, sensitive):
+            # PII フィルター（銀行・ログイン系 URL 除去）
+            if is_sensitive:
+                removed += 1
+                continue
+            # タイトルの PII マスク
+            e["title"] = mask_pii(e["title"])
+            cleaned.append(e)
+
+    if removed:
+        log.info(f"PII filter: {removed}件のセンシティブURLを除去")
+    return cleaned
 
-        # タイトルの PII マスク
-        e["title"] = mask_pii(e["title"])
-        cleaned.append(e)
 
-    # PII フィルター（銀行・ログイン系 URL 除去）
-    cleaned = filter_urls(cleaned, url_key="url")
-    return cleaned
+def url_id(url: str) -> str:
+    """URL から実行ごとに変わらない ID を作る（組み込み hash() はプロセスごとにソルトが変わる）"""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
 
 
 def entries_to_chunks(entries: list[dict], device: str) -> tuple[list[str], list[dict], list[str]]:
@@ -116,7 +167,7 @@ def entries_to_chunks(entries: list[dict], device: str) -> tuple[list[str], list
             "visit_count": str(e["visit_count"]),
             "last_visit":  e["last_visit"],
         }
-        uid = f"chrome_{device}_{abs(hash(e['url']))}"
+        uid = f"chrome_{device}_{url_id(e['url'])}"
         texts.append(text)
         metas.append(meta)
         ids.append(uid)
@@ -124,8 +175,12 @@ def entries_to_chunks(entries: list[dict], device: str) -> tuple[list[str], list
     return texts, metas, ids
 
 
-def import_device(device: str, dry_run: bool = False) -> int:
-    """指定デバイスの Chrome 履歴をインポート"""
+def prepare_device(device: str, dry_run: bool = False) -> Optional[tuple[list[str], list[dict], list[str]]]:
+    """指定デバイスの Chrome 履歴を読み込み・クリーニングしてチャンクを返す
+
+    ChromaDB には触れないので、--all 時はワーカープロセスで並列実行できる。
+    履歴ファイルが無い場合・ドライラン時は None / 空チャンクを返す。
+    """
     device_dir = RAW_DIR / device
     # History.db または History（拡張子なし）の両方に対応
     db_path = device_dir / "History.db"
@@ -136,33 +191,33 @@ def import_device(device: str, dry_run: bool = False) -> int:
         log.error(f"History file not found in: {device_dir}")
         log.info("手順: Chrome を完全終了後、以下を実行してください:")
         log.info(f'  cp "/mnt/c/Users/<User>/AppData/Local/Google/Chrome/User Data/Default/History" {device_dir}/History')
-        return 0
+        return None
 
     log.info(f"=== Importing Chrome history: {device} ({db_path}) ===")
 
-    # 読み込み
-    raw = load_history(db_path)
-    log.info(f"Raw entries: {len(raw)}")
-
-    # クリーニング
-    cleaned = clean_entries(raw)
-    log.info(f"After cleaning: {len(cleaned)} (removed {len(raw) - len(cleaned)})")
+    # 読み込み・クリーニング（行を取り出しながらフィルタリング）
+    cleaned = clean_entries(load_history(db_path))
+    log.info(f"After cleaning: {len(cleaned)}")
 
     if dry_run:
         log.info("[DRY RUN] 上位10件プレビュー:")
         for e in cleaned[:10]:
             print(f"  [{e['visit_count']:4d}] {e['title'][:50]} | {e['url'][:60]}")
-        return len(cleaned)
+        return entries_to_chunks(cleaned, device)
 
     # 処理済み JSON を保存
     PROC_DIR.mkdir(parents=True, exist_ok=True)
     proc_path = PROC_DIR / f"{device}_history.json"
-    with open(proc_path, "w", encoding="utf-8") as f:
-        json.dump(cleaned, f, ensure_ascii=False, indent=2)
+    with open(proc_path, "wb") as f:
+        f.write(orjson.dumps(cleaned, option=orjson.OPT_INDENT_2))
     log.info(f"Saved: {proc_path}")
 
-    # ChromaDB に格納
-    texts, metas, ids = entries_to_chunks(cleaned, device)
+    return entries_to_chunks(cleaned, device)
+
+
+def store_device(device: str, chunks: tuple[list[str], list[dict], list[str]]) -> int:
+    """チャンクを ChromaDB に格納（既存の同デバイス分は削除して入れ替え）"""
+    texts, metas, ids = chunks
     store = VectorStore()
 
     # 既存エントリを削除して再インポート（upsert 代替）
@@ -183,6 +238,34 @@ def import_device(device: str, dry_run: bool = False) -> int:
     return added
 
 
+def import_device(device: str, dry_run: bool = False) -> int:
+    """指定デバイスの Chrome 履歴をインポート"""
+    chunks = prepare_device(device, dry_run)
+    if chunks is None:
+        return 0
+    if dry_run:
+        return len(chunks[0])
+    return store_device(device, chunks)
+
+
+def import_all(devices: list[str], dry_run: bool = False) -> int:
+    """全デバイスを並列に読み込み・クリーニングし、ChromaDB への書き込みはメインプロセスで直列に行う"""
+    total = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(MAX_IMPORT_WORKERS, len(devices)))) as ex:
+        futures = {ex.submit(prepare_device, d, dry_run): d for d in devices}
+        for future in as_completed(futures):
+            device = futures[future]
+            try:
+                chunks = future.result()
+            except Exception as e:
+                log.error(f"Import failed (device={device}): {e}")
+                continue
+            if chunks is None:
+                continue
+            total += len(chunks[0]) if dry_run else store_device(device, chunks)
+    return total
+
+
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -197,7 +280,7 @@ def main():
     if args.all:
         devices = [d.name for d in RAW_DIR.iterdir() if d.is_dir()]
         log.info(f"All devices: {devices}")
-        total = sum(import_device(d, args.dry_run) for d in devices)
+        total = import_all(devices, args.dry_run)
     else:
         total = import_device(args.device, args.dry_run)
 
@@ -14,23 +14,29 @@ ChromaDB（personal_private コレクション）に格納する。
 
   # バッチサイズ変更
   python scripts/import_twitter.py --batch-size 200
+
+  # Ollama bge-m3 で埋め込んで格納（新規コレクション向け）
+  python scripts/import_twitter.py --ollama-embed
 """
 
 import argparse
 import html
-import json
 import logging
 import re
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import orjson
 
 # プロジェクトルートを sys.path に追加
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
-from rag.pii_filter import mask_pii
-from rag.vector_store import COLLECTION_PRIVATE
+from rag.embeddings import OLLAMA_EMBED_MODEL
+from rag.pii_filter import mask_pii_batch
+from rag.vector_store import COLLECTION_PRIVATE, OLLAMA_PREFIX, open_collection
 
 log = logging.getLogger(__name__)
 
@@ -39,21 +45,40 @@ RAW_DIR = DATA_DIR / "raw" / "twitter" / "account-main" / "data"
 PROC_DIR = DATA_DIR / "processed" / "twitter"
 TWEETS_JS = RAW_DIR / "tweets.js"
 
-OLLAMA_URL = "http://localhost:11434/api/embeddings"
-OLLAMA_MODEL = "bge-m3"
-
 BATCH_SIZE = 100
+EXISTING_ID_CHUNK = 500  # 既存ID確認で1回の collection.get に渡すID数
+
+TWEETS_JS_PREFIX = b"window.YTD.tweets.part0 = "
+_RE_URL = re.compile(r"https?://\S+")
+_RE_TCO = re.compile(r"https://t\.co/\S+")
+
+# これより大きいアーカイブは ijson でストリーム解析する（小さいファイルは一括 orjson の方が速い）
+STREAM_PARSE_MIN_BYTES = 20 * 1024 * 1024
+
+
+def iter_tweets(path: Path) -> Iterator[dict]:
+    """tweets.js をパースしてツイートを1件ずつ返す
+
+    大きなアーカイブは ijson で逐次パースし、ファイル全体の文字列と
+    パース済みリストを同時にメモリに載せない（ijson 未インストール時は一括パース）。
+    """
+    with path.open("rb") as f:
+        # "window.YTD.tweets.part0 = " プレフィックスを確認して読み飛ばす
+        if f.read(len(TWEETS_JS_PREFIX)) != TWEETS_JS_PREFIX:
+            raise ValueError(f"Unexpected file format: {path}")
 
+        if path.stat().st_size >= STREAM_PARSE_MIN_BYTES:
+            try:
+                import ijson
+            except ImportError:
+                log.info("ijson 未インストール: tweets.js を一括パースします")
+            else:
+                for tweet in ijson.items(f, "item.tweet"):
+                    yield tweet
+                return
 
-def load_tweets(path: Path) -> list[dict]:
-    """tweets.js をパースしてツイートリストを返す"""
-    content = path.read_text(encoding="utf-8")
-    # "window.YTD.tweets.part0 = " プレフィックスを除去
-    prefix = "window.YTD.tweets.part0 = "
-    if not content.startswith(prefix):
-        raise ValueError(f"Unexpected file format: {path}")
-    data = json.loads(content[len(prefix):])
-    return [item["tweet"] for item in data]
+        for item in orjson.loads(f.read()):
+            yield item["tweet"]
 
 
 def is_retweet(tweet: dict) -> bool:
@@ -63,7 +88,10 @@ def is_retweet(tweet: dict) -> bool:
 
 def is_url_only(text: str) -> bool:
     """URL のみのテキストかどうか"""
-    stripped = re.sub(r"https?://\S+", "", text).strip()
+    # URL で始まらないテキストは正規表現を使わずに除外できる
+    if not text.startswith("http"):
+        return False
+    stripped = _RE_URL.sub("", text).strip()
     return len(stripped) == 0
 
 
@@ -87,7 +115,7 @@ def expand_urls(tweet: dict) -> str:
             text = text.replace(short_url, "")
 
     # 残った t.co リンクを除去
-    text = re.sub(r"https://t\.co/\S+", "", text)
+    text = _RE_TCO.sub("", text)
 
     # HTML entities デコード
     text = html.unescape(text)
@@ -105,12 +133,14 @@ def classify_tweet(tweet: dict) -> str:
     return "tweet"
 
 
-def process_tweets(tweets: list[dict]) -> list[dict]:
-    """ツイートをフィルタリング・正規化"""
+def process_tweets(tweets: Iterable[dict]) -> list[dict]:
+    """ツイートをフィルタリング・正規化（iter_tweets からの逐次入力を想定）"""
     processed = []
-    stats = {"total": len(tweets), "rt": 0, "empty": 0, "url_only": 0, "kept": 0}
+    stats = {"total": 0, "rt": 0, "empty": 0, "url_only": 0, "kept": 0}
 
     for tweet in tweets:
+        stats["total"] += 1
+
         # リツイート除外
         if is_retweet(tweet):
             stats["rt"] += 1
@@ -129,10 +159,7 @@ def process_tweets(tweets: list[dict]) -> list[dict]:
             stats["url_only"] += 1
             continue
 
-        # PII除去
-        text = mask_pii(text)
-
-        # メタデータ
+        # メタデータ（PII除去はフィルタ後にまとめて行う）
         source_type = classify_tweet(tweet)
         created_at = tweet.get("created_at", "")
 
@@ -146,27 +173,47 @@ def process_tweets(tweets: list[dict]) -> list[dict]:
         })
         stats["kept"] += 1
 
+    # PII除去
+    texts = mask_pii_batch([t["text"] for t in processed])
+    for t, text in zip(processed, texts):
+        t["text"] = text
+
     return processed, stats
 
 
-def get_chromadb_collection():
-    """ChromaDBコレクションを取得（既存コレクションと一貫したデフォルトef使用）"""
+def write_processed(path: Path, records: list[dict]) -> None:
+    """処理済みツイートを1件ずつ書き出す（JSON全体の文字列をメモリ上に作らない）"""
+    with open(path, "wb") as f:
+        f.write(b"[")
+        for i, record in enumerate(records):
+            f.write(b",\n  " if i else b"\n  ")
+            f.write(orjson.dumps(record))
+        f.write(b"\n]\n" if records else b"]\n")
+
+
+def get_chromadb_collection(ollama_embed: bool = False):
+    """ChromaDBコレクションを取得（コレクションに記録された埋め込みを使用）"""
     import chromadb
 
     persist_dir = DATA_DIR / "embeddings" / "chromadb"
     persist_dir.mkdir(parents=True, exist_ok=True)
 
     client = chromadb.PersistentClient(path=str(persist_dir))
+    if ollama_embed:
+        # bge-m3（1024次元）で埋め込むことをコレクションに記録し、検索側も Ollama で埋め込めるようにする。
+        # 別の埋め込みで作成済みのコレクションには追加できない（open_collection が ValueError）
+        return open_collection(client, COLLECTION_PRIVATE, embedder=OLLAMA_PREFIX + OLLAMA_EMBED_MODEL)
     # 既存の personal_private コレクション（Chrome履歴2178件）はデフォルトefで作成済み。
-    # 一貫性を保つためefを指定せずデフォルト（all-MiniLM-L6-v2）を使用する。
-    collection = client.get_or_create_collection(
-        name=COLLECTION_PRIVATE,
-        metadata={"hnsw:space": "cosine"},
-    )
-    return collection
+    # コレクションに記録された埋め込み（記録なしならデフォルト all-MiniLM-L6-v2）で開き、一貫性を保つ
+    return open_collection(client, COLLECTION_PRIVATE)
 
 
-def import_tweets(processed: list[dict], batch_size: int, dry_run: bool = False) -> int:
+def import_tweets(
+    processed: list[dict],
+    batch_size: int,
+    dry_run: bool = False,
+    ollama_embed: bool = False,
+) -> int:
     """処理済みツイートをChromaDBに格納"""
     if dry_run:
         log.info("[DRY RUN] 上位10件プレビュー:")
@@ -174,13 +221,15 @@ def import_tweets(processed: list[dict], batch_size: int, dry_run: bool = False)
             print(f"  [{t['source_type']:5s} likes:{t['like_count']:3d}] {t['text'][:80]}")
         return len(processed)
 
-    collection = get_chromadb_collection()
+    collection = get_chromadb_collection(ollama_embed)
 
-    # 既存IDを取得して冪等実行
+    # 既存IDを取得して冪等実行（今回の取り込み候補のIDだけを問い合わせる）
     existing_ids = set()
+    candidates = [f"tweet_{t['id']}" for t in processed]
     try:
-        result = collection.get(where={"source": "twitter"})
-        existing_ids = set(result["ids"])
+        for i in range(0, len(candidates), EXISTING_ID_CHUNK):
+            result = collection.get(ids=candidates[i:i + EXISTING_ID_CHUNK], include=[])
+            existing_ids.update(result["ids"])
         log.info(f"既存のTwitterエントリ: {len(existing_ids)}件")
     except Exception:
         pass
@@ -212,6 +261,7 @@ def import_tweets(processed: list[dict], batch_size: int, dry_run: bool = False)
         if not texts:
             continue
 
+        # --ollama-embed 時はコレクションの埋め込み関数がバッチ全体を /api/embed 1回で埋め込む
         collection.add(documents=texts, metadatas=metas, ids=ids)
         added_total += len(texts)
 
@@ -231,20 +281,20 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="インポートせずプレビューのみ")
     parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"バッチサイズ (default: {BATCH_SIZE})")
     parser.add_argument("--tweets-js", type=Path, default=TWEETS_JS, help="tweets.js のパス")
+    parser.add_argument(
+        "--ollama-embed", action="store_true",
+        help="Ollama bge-m3 で埋め込んで格納（コレクションに ollama:bge-m3 と記録。別の埋め込みで作成済みなら中止）",
+    )
     args = parser.parse_args()
 
     if not args.tweets_js.exists():
         log.error(f"tweets.js が見つかりません: {args.tweets_js}")
         sys.exit(1)
 
-    # 読み込み
+    # 読み込み・処理（パースしながらフィルタリング）
     log.info(f"=== Twitter Archive Import ===")
     log.info(f"Source: {args.tweets_js}")
-    tweets = load_tweets(args.tweets_js)
-    log.info(f"読み込み: {len(tweets)}件")
-
-    # 処理
-    processed, stats = process_tweets(tweets)
+    processed, stats = process_tweets(iter_tweets(args.tweets_js))
     log.info(f"フィルタリング結果:")
     log.info(f"  総数:      {stats['total']}")
     log.info(f"  RT除外:    {stats['rt']}")
@@ -255,8 +305,7 @@ def main():
     # 処理済みJSON保存
     PROC_DIR.mkdir(parents=True, exist_ok=True)
     proc_path = PROC_DIR / "tweets_processed.json"
-    with open(proc_path, "w", encoding="utf-8") as f:
-        json.dump(processed, f, ensure_ascii=False, indent=2)
+    write_processed(proc_path, processed)
     log.info(f"処理済みデータ保存: {proc_path}")
 
     # インポート
@@ -264,7 +313,11 @@ def main():
         import_tweets(processed, args.batch_size, dry_run=True)
         print(f"\n[DRY RUN] {stats['kept']}件が取り込み対象です")
     else:
-        added, skipped = import_tweets(processed, args.batch_size)
+        try:
+            added, skipped = import_tweets(processed, args.batch_size, ollama_embed=args.ollama_embed)
+        except ValueError as e:
+            log.error(f"インポート中止: {e}")
+            sys.exit(1)
         print(f"\n=== サマリー ===")
         print(f"  新規追加: {added}件")
         print(f"  スキップ(既存): {skipped}件")
@@ -14,6 +14,7 @@ cron等で毎週日曜 03:00 JST に実行することを想定。
   python scripts/memory_cleanup.py
   python scripts/memory_cleanup.py --cleanup-only   # 要約なし
   python scripts/memory_cleanup.py --summarize-only  # クリーンアップなし
+  python scripts/memory_cleanup.py --migrate-timestamps  # 旧形式(ISO文字列)の timestamp を変換のみ
 """
 
 import argparse
@@ -37,10 +38,16 @@ def main():
     parser = argparse.ArgumentParser(description="エージェントメモリ クリーンアップバッチ")
     parser.add_argument("--cleanup-only", action="store_true", help="TTL/容量クリーンアップのみ（要約なし）")
     parser.add_argument("--summarize-only", action="store_true", help="週次要約のみ（クリーンアップなし）")
+    parser.add_argument("--migrate-timestamps", action="store_true", help="timestamp を UNIX秒に移行して終了")
     args = parser.parse_args()
 
     mm = MemoryManager()
 
+    if args.migrate_timestamps:
+        migrated = mm.migrate_timestamps()
+        log.info(f"timestamp 移行完了: {migrated}件")
+        return
+
     log.info("=== メモリクリーンアップ開始 ===")
     log.info(f"実行前: {mm.stats()}")
 
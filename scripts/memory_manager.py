@@ -13,14 +13,20 @@ Ollamaによる週次要約生成を行う。
 容量管理:
   - 上限: 1000件（超過時は低importance順に削除）
   - 週次クリーンアップ: TTL切れ削除 + Ollama要約生成
+
+timestamp / expires_at は UNIX秒（int）で保存し、ChromaDB の where で範囲検索する。
+旧形式（ISO文字列）のエントリは migrate_timestamps() で一度だけ変換する。
 """
 
+import atexit
+import heapq
 import json
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import httpx
 
@@ -31,11 +37,50 @@ EMBEDDINGS_DIR = Path(__file__).parent.parent / "data" / "embeddings"
 COLLECTION_NAME = "agent_memory"
 TTL_DAYS = 90
 MAX_ENTRIES = 1000
+PAGE_SIZE = 500  # col.get / col.delete を分割する件数
 OLLAMA_URL = "http://localhost:11434"
 OLLAMA_MODEL = "qwen3:8b"
 
+# 週次要約: 1回のプロンプトに入れるエントリ数の上限（超えたら分割して部分要約→統合）
+SUMMARY_CHUNK = 20
+SUMMARY_CONCURRENCY = 4
+
+WEEKLY_SUMMARY_PROMPT = (
+    "以下はAIエージェントの直近1週間の会話ログとリサーチ結果です。\n"
+    "これらを簡潔に要約してください（日本語、500字以内）。\n"
+    "重要なトピック、学んだこと、傾向を中心にまとめてください。"
+)
+PARTIAL_SUMMARY_PROMPT = (
+    "以下はAIエージェントの会話ログとリサーチ結果の一部です。\n"
+    "重要なトピックと学んだことを日本語200字以内で要約してください。"
+)
+
 JST = timezone(timedelta(hours=9))
 
+# Ollama 呼び出し用クライアント（要約のたびに接続を張り直さない）
+_HTTP = httpx.Client(timeout=120, limits=httpx.Limits(max_keepalive_connections=4))
+atexit.register(_HTTP.close)
+
+# timestamp / expires_at を UNIX秒に移行済みであることを示すマーカー（persist_dir 内）
+TS_MIGRATED_MARKER = ".agent_memory_epoch_ts"
+
+
+def _iter_metadatas(col, page: int = PAGE_SIZE) -> Iterator[tuple[str, dict]]:
+    """コレクション全体の (id, metadata) を page 件ずつ取得して返す"""
+    offset = 0
+    while True:
+        data = col.get(include=["metadatas"], limit=page, offset=offset)
+        yield from zip(data["ids"], data["metadatas"])
+        if len(data["ids"]) < page:
+            return
+        offset += page
+
+
+def _delete_batched(col, ids: list[str], page: int = PAGE_SIZE) -> None:
+    """ids を page 件ずつ削除（巨大な IN 句を避ける）"""
+    for i in range(0, len(ids), page):
+        col.delete(ids=ids[i:i + page])
+
 
 class MemoryManager:
     """ChromaDB ベースのエージェントメモリ管理"""
@@ -57,12 +102,11 @@ class MemoryManager:
         """ChromaDB コレクションを遅延初期化"""
         if self._collection is None:
             import chromadb
+            from rag.vector_store import open_collection
 
             self._client = chromadb.PersistentClient(path=str(self.persist_dir))
-            self._collection = self._client.get_or_create_collection(
-                name=COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"},
-            )
+            # 記録済みの埋め込み関数で開く（VECTOR_STORE_EMBEDDER で作成されたコレクションにも対応）
+            self._collection = open_collection(self._client, COLLECTION_NAME)
             log.info(f"ChromaDB collection '{COLLECTION_NAME}' ready: {self.persist_dir}")
         return self._collection
 
@@ -85,8 +129,8 @@ class MemoryManager:
         return {
             "type": entry_type,
             "importance": str(importance),
-            "timestamp": now.isoformat(),
-            "expires_at": (now + timedelta(days=TTL_DAYS)).isoformat(),
+            "timestamp": int(now.timestamp()),
+            "expires_at": int((now + timedelta(days=TTL_DAYS)).timestamp()),
             "topic": topic,
         }
 
@@ -141,17 +185,14 @@ class MemoryManager:
         col = self._get_collection()
         stats = {"expired_deleted": 0, "overflow_deleted": 0, "remaining": 0}
 
-        # 1. TTL切れエントリの削除
-        now_iso = self._now().isoformat()
-        all_data = col.get(include=["metadatas"])
+        self._ensure_epoch_timestamps()
 
-        expired_ids = []
-        for i, meta in enumerate(all_data["metadatas"]):
-            if meta.get("expires_at", "") < now_iso:
-                expired_ids.append(all_data["ids"][i])
+        # 1. TTL切れエントリの削除（ChromaDB 側で範囲検索し、IDだけ受け取る）
+        now_ts = int(self._now().timestamp())
+        expired_ids = col.get(where={"expires_at": {"$lt": now_ts}}, include=[])["ids"]
 
         if expired_ids:
-            col.delete(ids=expired_ids)
+            _delete_batched(col, expired_ids)
             stats["expired_deleted"] = len(expired_ids)
             log.info(f"TTL切れ削除: {len(expired_ids)}件")
 
@@ -159,14 +200,14 @@ class MemoryManager:
         count = col.count()
         if count > MAX_ENTRIES:
             overflow = count - MAX_ENTRIES
-            all_data = col.get(include=["metadatas"])
-
-            # importance昇順でソート → 低い方からoverflow件削除
-            indexed = list(zip(all_data["ids"], all_data["metadatas"]))
-            indexed.sort(key=lambda x: float(x[1].get("importance", "0")))
 
-            delete_ids = [item[0] for item in indexed[:overflow]]
-            col.delete(ids=delete_ids)
+            # importance の低い方から overflow 件を、ページ単位で読みながら選ぶ
+            lowest = heapq.nsmallest(
+                overflow, _iter_metadatas(col),
+                key=lambda item: float(item[1].get("importance", "0")),
+            )
+            delete_ids = [doc_id for doc_id, _ in lowest]
+            _delete_batched(col, delete_ids)
             stats["overflow_deleted"] = len(delete_ids)
             log.info(f"容量超過削除: {len(delete_ids)}件 (上限{MAX_ENTRIES})")
 
@@ -174,27 +215,73 @@ class MemoryManager:
         log.info(f"クリーンアップ完了: {stats}")
         return stats
 
+    def _ensure_epoch_timestamps(self) -> None:
+        """旧形式（ISO文字列）の timestamp は範囲検索にかからないので、未移行なら先に変換"""
+        if not (self.persist_dir / TS_MIGRATED_MARKER).exists():
+            self.migrate_timestamps()
+
+    def _ollama_summarize(self, instruction: str, docs: list[str], max_tokens: int) -> str:
+        """docs を区切り線で連結し、instruction に続けて Ollama で要約"""
+        combined = "\n\n---\n\n".join(docs)
+        resp = _HTTP.post(
+            f"{self.ollama_url}/api/generate",
+            json={
+                "model": self.ollama_model,
+                "prompt": f"{instruction}\n\n{combined}",
+                "stream": False,
+                "think": False,
+                "options": {"num_predict": max_tokens, "temperature": 0.5},
+            },
+        )
+        resp.raise_for_status()
+        return resp.json()["response"].strip()
+
+    def migrate_timestamps(self) -> int:
+        """旧形式（ISO文字列）の timestamp / expires_at を UNIX秒に書き換える（一度だけ実行）"""
+        col = self._get_collection()
+
+        ids, metas = [], []
+        for doc_id, meta in _iter_metadatas(col):
+            changed = False
+            for key in ("timestamp", "expires_at"):
+                value = meta.get(key)
+                if isinstance(value, str):
+                    try:
+                        meta[key] = int(datetime.fromisoformat(value).timestamp())
+                        changed = True
+                    except ValueError:
+                        log.warning(f"timestamp 変換失敗 ({doc_id}.{key}={value!r})")
+            if changed:
+                ids.append(doc_id)
+                metas.append(meta)
+
+        if ids:
+            for i in range(0, len(ids), PAGE_SIZE):
+                col.update(ids=ids[i:i + PAGE_SIZE], metadatas=metas[i:i + PAGE_SIZE])
+            log.info(f"timestamp を UNIX秒に移行: {len(ids)}件")
+        (self.persist_dir / TS_MIGRATED_MARKER).touch()
+        return len(ids)
+
     # ─── 週次要約 ──────────────────────────────────────────────────
 
     def summarize_week(self) -> Optional[str]:
         """直近7日分のchat/researchエントリをOllamaで1件のsummaryに圧縮"""
         col = self._get_collection()
+        self._ensure_epoch_timestamps()
 
         # 直近7日のタイムスタンプ閾値
-        week_ago = (self._now() - timedelta(days=7)).isoformat()
-
-        # chat/research エントリを取得
-        all_data = col.get(include=["documents", "metadatas"])
-        if not all_data["ids"]:
-            log.info("要約対象なし（コレクション空）")
-            return None
-
-        target_ids = []
-        target_docs = []
-        for i, meta in enumerate(all_data["metadatas"]):
-            if meta.get("type") in ("chat", "research") and meta.get("timestamp", "") >= week_ago:
-                target_ids.append(all_data["ids"][i])
-                target_docs.append(all_data["documents"][i])
+        week_ago_ts = int((self._now() - timedelta(days=7)).timestamp())
+
+        # 直近7日の chat/research エントリだけを取得
+        all_data = col.get(
+            where={"$and": [
+                {"timestamp": {"$gte": week_ago_ts}},
+                {"type": {"$in": ["chat", "research"]}},
+            ]},
+            include=["documents", "metadatas"],
+        )
+        target_ids = all_data["ids"]
+        target_docs = all_data["documents"]
 
         if not target_docs:
             log.info("直近7日の要約対象エントリなし")
@@ -202,55 +289,41 @@ class MemoryManager:
 
         log.info(f"要約対象: {len(target_docs)}件")
 
-        # Ollamaで要約生成
-        combined = "\n\n---\n\n".join(target_docs)
-        prompt = (
-            "以下はAIエージェントの直近1週間の会話ログとリサーチ結果です。\n"
-            "これらを簡潔に要約してください（日本語、500字以内）。\n"
-            "重要なトピック、学んだこと、傾向を中心にまとめてください。\n\n"
-            f"{combined}"
-        )
-
+        # Ollamaで要約生成（件数が多ければ SUMMARY_CHUNK 件ずつ要約してから要約を統合）
         try:
-            resp = httpx.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "think": False,
-                    "options": {"num_predict": 800, "temperature": 0.5},
-                },
-                timeout=120,
-            )
-            resp.raise_for_status()
-            summary_text = resp.json()["response"].strip()
+            if len(target_docs) <= SUMMARY_CHUNK:
+                summary_text = self._ollama_summarize(WEEKLY_SUMMARY_PROMPT, target_docs, 800)
+            else:
+                chunks = [
+                    target_docs[i:i + SUMMARY_CHUNK]
+                    for i in range(0, len(target_docs), SUMMARY_CHUNK)
+                ]
+                with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+                    partials = list(pool.map(
+                        lambda chunk: self._ollama_summarize(PARTIAL_SUMMARY_PROMPT, chunk, 200),
+                        chunks,
+                    ))
+                log.info(f"部分要約: {len(partials)}件 → 統合")
+                summary_text = self._ollama_summarize(WEEKLY_SUMMARY_PROMPT, partials, 800)
         except Exception as e:
             log.error(f"Ollama要約生成失敗: {e}")
             return None
 
         # summary エントリを保存
-        # importance は元エントリの最大値を継承
-        max_importance = 0.0
-        for i, meta in enumerate(all_data["metadatas"]):
-            if all_data["ids"][i] in target_ids:
-                max_importance = max(max_importance, float(meta.get("importance", "0")))
+        # importance は元エントリの最大値を継承（取得済みの metadatas を1回走査）
+        max_importance = max(
+            (float(meta.get("importance", "0")) for meta in all_data["metadatas"]),
+            default=0.0,
+        )
 
         doc_id = self._make_id()
-        now = self._now()
-        metadata = {
-            "type": "summary",
-            "importance": str(round(max_importance, 1)),
-            "timestamp": now.isoformat(),
-            "expires_at": (now + timedelta(days=TTL_DAYS)).isoformat(),
-            "topic": "weekly_summary",
-        }
+        metadata = self._build_metadata("summary", round(max_importance, 1), topic="weekly_summary")
 
         col.add(documents=[f"[summary] {summary_text}"], metadatas=[metadata], ids=[doc_id])
         log.info(f"週次要約保存: id={doc_id}, importance={max_importance}")
 
         # 圧縮後の元エントリを削除（重複防止）
-        col.delete(ids=target_ids)
+        _delete_batched(col, target_ids)
         log.info(f"元エントリ削除: {len(target_ids)}件")
 
         return doc_id
@@ -260,6 +333,7 @@ class MemoryManager:
     def search_context(self, query: str, n_results: int = 3) -> list[dict]:
         """personal_private + agent_memory をベクトル検索してRAGコンテキストを返す"""
         import chromadb
+        from rag.vector_store import open_collection
 
         if self._client is None:
             self._client = chromadb.PersistentClient(path=str(self.persist_dir))
@@ -267,7 +341,8 @@ class MemoryManager:
         results = []
         for col_name in ["personal_private", "agent_memory"]:
             try:
-                col = self._client.get_collection(col_name)
+                # query_texts はコレクションに記録された埋め込みで埋め込む（別モデルで検索しない）
+                col = open_collection(self._client, col_name, create=False)
                 res = col.query(query_texts=[query], n_results=n_results)
                 docs = res.get("documents", [[]])[0]
                 metas = res.get("metadatas", [[]])[0]
@@ -282,9 +357,8 @@ class MemoryManager:
     def stats(self) -> dict:
         """コレクション統計を返す"""
         col = self._get_collection()
-        all_data = col.get(include=["metadatas"])
         type_counts = {"chat": 0, "research": 0, "summary": 0}
-        for meta in all_data["metadatas"]:
+        for _, meta in _iter_metadatas(col):
             t = meta.get("type", "unknown")
             if t in type_counts:
                 type_counts[t] += 1
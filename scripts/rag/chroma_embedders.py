@@ -0,0 +1,67 @@
+"""
+chroma_embedders.py - ChromaDB コレクションに付ける埋め込み関数
+
+コレクションの metadata["embedder"] に記録した埋め込みキーから Chroma の埋め込み関数を作る。
+書き込み（add の documents=）も検索（query_texts=）も記録どおりの関数で埋め込むことで、
+同じ次元の別モデルのベクトルが1つのコレクションに混ざるのを防ぐ。
+
+埋め込みキー:
+  all-MiniLM-L6-v2  : Chroma デフォルトef（記録のない既存コレクションもこれ）
+  fastembed:<model> : fastembed（ONNX Runtime）
+  ollama:<model>    : Ollama /api/embed（embeddings.embed_batch）
+
+chromadb を import するので、vector_store.open_collection から遅延 import して使う。
+"""
+
+import threading
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+from .vector_store import FASTEMBED_PREFIX, OLLAMA_PREFIX
+
+
+class FastEmbedFunction(EmbeddingFunction[Documents]):
+    """fastembed の TextEmbedding を Chroma の埋め込み関数として使う"""
+
+    def __init__(self, model_name: str):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError:
+            raise ImportError(
+                "fastembed がインストールされていません。"
+                "`pip install fastembed` を実行してください。"
+            )
+        self._model = TextEmbedding(model_name=model_name)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [v.tolist() for v in self._model.embed(list(input))]
+
+
+class OllamaEmbedFunction(EmbeddingFunction[Documents]):
+    """Ollama /api/embed（embed_batch）を Chroma の埋め込み関数として使う"""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def __call__(self, input: Documents) -> Embeddings:
+        from .embeddings import embed_batch
+        return embed_batch(list(input), model=self.model)
+
+
+# 埋め込みキー → 埋め込み関数（モデルのロードはプロセスで1回）
+_functions: dict[str, EmbeddingFunction] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_function(embedder: str) -> EmbeddingFunction:
+    """埋め込みキーに対応する Chroma の埋め込み関数"""
+    with _lock:
+        if embedder not in _functions:
+            if embedder.startswith(FASTEMBED_PREFIX):
+                _functions[embedder] = FastEmbedFunction(embedder[len(FASTEMBED_PREFIX):])
+            elif embedder.startswith(OLLAMA_PREFIX):
+                _functions[embedder] = OllamaEmbedFunction(embedder[len(OLLAMA_PREFIX):])
+            else:
+                _functions[embedder] = embedding_functions.DefaultEmbeddingFunction()
+        return _functions[embedder]
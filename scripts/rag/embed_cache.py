@@ -0,0 +1,144 @@
+"""
+embed_cache.py - 埋め込みベクトルの永続キャッシュ
+
+(モデル名, テキスト) の SHA-256 をキーに、埋め込みを int8 + ベクトルごとの float16 スケールで
+SQLite に保存する（float32 の約1/4）。再インデックスや同じクエリの再検索で、
+同一テキストの埋め込み計算を省く。呼び出し側には float32 を返すが、値はヒット・ミスとも
+int8 から復元したもの（キャッシュの有無で同じテキストの埋め込みが変わらないようにする）。
+
+保存先: data/embeddings/cache/embeddings.sqlite3
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "embeddings" / "cache"
+CACHE_PATH = CACHE_DIR / "embeddings.sqlite3"
+
+# SQLite の変数上限（古いビルドは999）に収まるよう IN 句を分割する
+_LOOKUP_CHUNK = 500
+
+# 量子化前後のコサイン類似度がこれを下回ったら警告する（int8 + 行スケールなら通常 0.999 以上）
+QUANT_MIN_COSINE = 0.99
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(n, dim) の float 配列を int8 とベクトルごとの float16 スケールに量子化"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scale = np.max(np.abs(vectors), axis=1, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0  # ゼロベクトルは 0 のまま
+    q = np.round(vectors / scale).astype(np.int8)
+    return q, scale.astype(np.float16)
+
+
+def dequantize(q: np.ndarray, scale) -> np.ndarray:
+    """quantize の逆変換（float32）"""
+    return q.astype(np.float32) * np.float32(scale)
+
+
+class EmbeddingCache:
+    """(モデル名, テキスト) → 埋め込みベクトル の SQLite キャッシュ（int8 で保存）"""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_i8 (key BLOB PRIMARY KEY, vec BLOB, scale REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(model_name: str, text: str) -> bytes:
+        return hashlib.sha256((model_name + "\0" + text).encode("utf-8")).digest()
+
+    def get_many(self, model_name: str, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """texts と同じ順でベクトルを返す（未キャッシュは None）"""
+        keys = [self._key(model_name, t) for t in texts]
+        found: dict[bytes, tuple[bytes, float]] = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec, scale FROM cache_i8 WHERE key IN ({placeholders})", chunk
+                )
+                found.update((key, (vec, scale)) for key, vec, scale in rows)
+        return [
+            dequantize(np.frombuffer(found[k][0], dtype=np.int8), found[k][1]) if k in found else None
+            for k in keys
+        ]
+
+    def put_many(self, model_name: str, texts: list[str], vectors) -> np.ndarray:
+        """ベクトルを int8 に量子化して保存し（既存キーはそのまま）、get_many と同じ復元値を返す"""
+        vectors = np.stack([np.asarray(v, dtype=np.float32) for v in vectors])
+        q, scale = quantize(vectors)
+        restored = dequantize(q, scale)
+        _check_quantization(vectors, restored)
+        rows = [
+            (self._key(model_name, t), qv.tobytes(), float(s))
+            for t, qv, s in zip(texts, q, scale[:, 0])
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cache_i8 (key, vec, scale) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return restored
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _check_quantization(original: np.ndarray, restored: np.ndarray) -> None:
+    """量子化で向きが大きく変わったベクトルがあれば警告"""
+    norms = np.linalg.norm(original, axis=1) * np.linalg.norm(restored, axis=1)
+    nonzero = norms > 0
+    if not nonzero.any():
+        return
+    cos = np.sum(original * restored, axis=1)[nonzero] / norms[nonzero]
+    worst = float(cos.min())
+    if worst < QUANT_MIN_COSINE:
+        log.warning(f"埋め込みキャッシュの量子化誤差が大きい: 最小コサイン類似度 {worst:.4f}")
+
+
+def cached_encode(
+    cache: EmbeddingCache,
+    model_name: str,
+    texts: list[str],
+    encode: Callable[[list[str]], list],
+) -> np.ndarray:
+    """キャッシュにないテキストだけ encode() で埋め込み、元の順序で (len(texts), dim) の配列で返す
+
+    ミス分も保存した int8 から復元した値を返すので、キャッシュの状態によらず結果は同じ。
+    """
+    vectors = cache.get_many(model_name, texts)
+    # 同一バッチ内の重複テキストも1回だけ計算する
+    misses = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if misses:
+        computed = dict(zip(misses, cache.put_many(model_name, misses, encode(misses))))
+        vectors = [computed[t] if v is None else v for t, v in zip(texts, vectors)]
+    log.debug(f"埋め込みキャッシュ: {len(texts) - len(misses)}/{len(texts)} hit")
+    return np.asarray(vectors, dtype=np.float32)
+
+
+# シングルトン
+_cache: Optional[EmbeddingCache] = None
+
+def get_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
@@ -4,32 +4,54 @@ embeddings.py - ローカル埋め込みモデルラッパー
 Phase 1: sentence-transformers（ローカル実行・プライバシー重視）
 推奨モデル: BAAI/bge-m3（JMTEB日本語 79.74、Dense+Sparse対応）
 軽量代替:  intfloat/multilingual-e5-small（速度重視）
+
+Ollama 経由: embed_batch() がバッチ単位で /api/embed を1回だけ呼ぶ
 """
 
 import logging
+import os
 from typing import Optional
 
+import httpx
+
 log = logging.getLogger(__name__)
 
 # モデル選択
 DEFAULT_MODEL = "BAAI/bge-m3"
 FAST_MODEL    = "intfloat/multilingual-e5-small"
 
+# デバイスごとの既定バッチサイズ（GPU/MPS は fp16 で載せるので大きめ）
+BATCH_SIZE_BY_DEVICE = {"cuda": 128, "mps": 64, "cpu": 32}
+
+# Ollama 埋め込み
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_EMBED_MODEL = "bge-m3"
+OLLAMA_EMBED_TIMEOUT = 60  # 秒（バッチ全体）
+
 
 class EmbeddingModel:
     """sentence-transformers ローカル埋め込みモデル"""
 
-    def __init__(self, model_name: str = DEFAULT_MODEL):
+    def __init__(self, model_name: str = DEFAULT_MODEL, use_cache: bool = True):
         self.model_name = model_name
+        self.use_cache = use_cache
         self._model = None
+        self.device = "cpu"
         log.info(f"EmbeddingModel initialized (lazy load): {model_name}")
 
     def _load(self):
         if self._model is None:
             try:
+                import torch
                 from sentence_transformers import SentenceTransformer
-                log.info(f"Loading model: {self.model_name} ...")
-                self._model = SentenceTransformer(self.model_name)
+                if torch.cuda.is_available():
+                    self.device = "cuda"
+                elif torch.backends.mps.is_available():
+                    self.device = "mps"
+                log.info(f"Loading model: {self.model_name} ({self.device}) ...")
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+                if self.device != "cpu":
+                    self._model.half()  # fp16 で重み・活性のメモリ帯域を半減
                 log.info(f"Model loaded: {self.model_name}")
             except ImportError:
                 raise ImportError(
@@ -37,22 +59,83 @@ class EmbeddingModel:
                     "`pip install sentence-transformers` を実行してください。"
                 )
 
-    def encode(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
-        """テキストリストをベクトルに変換"""
+    def encode(self, texts: list[str], batch_size: Optional[int] = None):
+        """テキストリストを (len(texts), dim) の float32 ndarray に変換
+
+        batch_size 省略時はデバイスに応じた既定値。use_cache 時は計算済みのテキストを
+        埋め込みキャッシュから返す。ChromaDB の embeddings= には配列のまま渡せる。
+        """
+        if self.use_cache:
+            from rag.embed_cache import cached_encode, get_cache
+            return cached_encode(
+                get_cache(), self.model_name, texts,
+                lambda misses: self._encode(misses, batch_size),
+            )
+        return self._encode(texts, batch_size)
+
+    def _encode(self, texts: list[str], batch_size: Optional[int]):
         self._load()
         embeddings = self._model.encode(
             texts,
-            batch_size=batch_size,
+            batch_size=batch_size or BATCH_SIZE_BY_DEVICE[self.device],
             show_progress_bar=len(texts) > 100,
+            convert_to_numpy=True,
             normalize_embeddings=True,  # cosine similarity 用に正規化
         )
-        return embeddings.tolist()
+        return embeddings.astype("float32", copy=False)
 
-    def encode_one(self, text: str) -> list[float]:
+    def encode_one(self, text: str):
         """単一テキストをベクトルに変換"""
         return self.encode([text])[0]
 
 
+# Ollama 呼び出し用クライアント（バッチ間で接続を使い回す）
+_http: Optional[httpx.Client] = None
+
+
+def _get_http() -> httpx.Client:
+    global _http
+    if _http is None:
+        _http = httpx.Client(base_url=OLLAMA_URL, timeout=OLLAMA_EMBED_TIMEOUT)
+    return _http
+
+
+def embed_batch(
+    texts: list[str],
+    model: str = OLLAMA_EMBED_MODEL,
+    use_cache: bool = True,
+) -> list[list[float]]:
+    """Ollama /api/embed でテキストリストを1リクエストで埋め込む
+
+    /api/embed が無い古い Ollama では /api/embeddings を1件ずつ呼ぶ。
+    use_cache 時は埋め込みキャッシュにないテキストだけを Ollama に送る。
+    """
+    if not texts:
+        return []
+    if use_cache:
+        from rag.embed_cache import cached_encode, get_cache
+        return cached_encode(
+            get_cache(), f"ollama:{model}", texts,
+            lambda misses: embed_batch(misses, model, use_cache=False),
+        ).tolist()
+
+    client = _get_http()
+    resp = client.post("/api/embed", json={"model": model, "input": texts})
+    if resp.status_code != 404:
+        resp.raise_for_status()
+        embeddings = resp.json().get("embeddings")
+        if embeddings is not None:
+            return embeddings
+
+    log.info("/api/embed 非対応: /api/embeddings で1件ずつ埋め込みます")
+    vectors = []
+    for text in texts:
+        r = client.post("/api/embeddings", json={"model": model, "prompt": text})
+        r.raise_for_status()
+        vectors.append(r.json()["embedding"])
+    return vectors
+
+
 # シングルトン
 _model: Optional[EmbeddingModel] = None
 
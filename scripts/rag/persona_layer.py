@@ -9,6 +9,8 @@ Phase 2: RAGから実際のAdmin発言を引っ張って動的生成
 Phase 3: ID-RAG知識グラフ (Neo4j) から注入
 """
 
+import copy
+import functools
 import os
 import json
 import logging
@@ -44,66 +46,74 @@ DEFAULT_PERSONA = {
 }
 
 
-def load_persona() -> dict:
-    """ペルソナ設定を読み込む（ファイルがあれば優先）"""
-    if PERSONA_CONFIG_PATH.exists():
+def _persona_mtime() -> float:
+    """ペルソナファイルの更新時刻（ファイルがなければ 0.0）"""
+    try:
+        return os.stat(PERSONA_CONFIG_PATH).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+@functools.lru_cache(maxsize=4)
+def _load_persona_cached(mtime: float) -> dict:
+    """mtime をキーにペルソナを読み込む（ファイルが更新されれば読み直す）"""
+    if mtime:
         with open(PERSONA_CONFIG_PATH, "r", encoding="utf-8") as f:
             return json.load(f)
     return DEFAULT_PERSONA
 
 
+def _current_persona() -> dict:
+    """キャッシュ済みのペルソナ（共有オブジェクトなので変更しないこと）"""
+    return _load_persona_cached(_persona_mtime())
+
+
+def load_persona() -> dict:
+    """ペルソナ設定を読み込む（ファイルがあれば優先）"""
+    # 呼び出し側が書き換えてもキャッシュが壊れないようコピーを返す
+    return copy.deepcopy(_current_persona())
+
+
 def save_persona(persona: dict) -> None:
     """ペルソナ設定を保存"""
     PERSONA_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(PERSONA_CONFIG_PATH, "w", encoding="utf-8") as f:
         json.dump(persona, f, ensure_ascii=False, indent=2)
+    # 同一秒内の書き込みで mtime が変わらない場合に備えて明示的に破棄
+    _load_persona_cached.cache_clear()
+    _persona_summary.cache_clear()
+    _cached_scaffold.cache_clear()
     log.info(f"Persona saved: {PERSONA_CONFIG_PATH}")
 
 
-def build_system_prompt(
-    task: str = "daily_research",
-    rag_context: Optional[list[dict]] = None,
-    persona: Optional[dict] = None,
-) -> str:
-    """
-    タスクとRAGコンテキストを元にシステムプロンプトを生成
+# タスク固有の指示
+TASK_INSTRUCTIONS = {
+    "daily_research": (
+        "今日のリサーチ・記事執筆タスクを実行してください。"
+        "Adminの興味関心と文体に沿った、読者に価値を届けるコンテンツを生成してください。"
+    ),
+    "article_writing": (
+        "Zenn/note向けの記事を執筆してください。"
+        "Adminの文体・価値観を反映した、実用的で読みやすい記事を書いてください。"
+    ),
+    "reflection": (
+        "本日の行動を振り返り、改善点と明日への学びを整理してください。"
+        "Adminの視点で、率直かつ建設的な内省を行ってください。"
+    ),
+}
+
+# 足場テンプレート中の RAG セクション差し込み位置
+RAG_PLACEHOLDER = "{RAG_SECTION}"
 
-    Args:
-        task: タスク種別 ("daily_research", "article_writing", "reflection")
-        rag_context: RAGから取得した関連ドキュメント（Phase 2以降）
-        persona: ペルソナ設定（Noneの場合はデフォルト）
-    """
-    p = persona or load_persona()
 
+def _render_scaffold(p: dict, task: str) -> str:
+    """RAG セクション以外のシステムプロンプトを組み立てる（RAG_PLACEHOLDER 入り）"""
     interests_str = "\n".join(f"  - {i}" for i in p.get("interests", []))
     values_str    = "\n".join(f"  - {v}" for v in p.get("values", []))
     style         = p.get("writing_style", {})
+    task_instructions = TASK_INSTRUCTIONS.get(task, "タスクを実行してください。")
 
-    # RAGコンテキストがあれば追加
-    rag_section = ""
-    if rag_context:
-        rag_section = "\n\n## 参照コンテキスト（過去の発言・記録）\n"
-        for i, doc in enumerate(rag_context[:5], 1):
-            src = doc.get("metadata", {}).get("source", "unknown")
-            rag_section += f"\n[{i}] ({src})\n{doc['text'][:300]}\n"
-
-    # タスク固有の指示
-    task_instructions = {
-        "daily_research": (
-            "今日のリサーチ・記事執筆タスクを実行してください。"
-            "Adminの興味関心と文体に沿った、読者に価値を届けるコンテンツを生成してください。"
-        ),
-        "article_writing": (
-            "Zenn/note向けの記事を執筆してください。"
-            "Adminの文体・価値観を反映した、実用的で読みやすい記事を書いてください。"
-        ),
-        "reflection": (
-            "本日の行動を振り返り、改善点と明日への学びを整理してください。"
-            "Adminの視点で、率直かつ建設的な内省を行ってください。"
-        ),
-    }.get(task, "タスクを実行してください。")
-
-    prompt = f"""あなたは {p.get('name', 'Admin')} のデジタルコピーとして動作するAIエージェントです。
+    return f"""あなたは {p.get('name', 'Admin')} のデジタルコピーとして動作するAIエージェントです。
 
 ## ペルソナプロフィール
 
@@ -117,7 +127,7 @@ def build_system_prompt(
   - トーン: {style.get('tone', '論理的・実用重視')}
   - フォーマット: {style.get('format', 'Markdown')}
   - 言語: {style.get('language', '日本語')}
-{rag_section}
+{RAG_PLACEHOLDER}
 ## 現在のタスク
 
 {task_instructions}
@@ -127,16 +137,54 @@ def build_system_prompt(
 「私は」と書く場合は {p.get('name', 'Admin')} の視点からの発言です。
 外部への破壊的操作（force push、本番環境変更等）は行いません。"""
 
-    return prompt
 
+@functools.lru_cache(maxsize=32)
+def _cached_scaffold(mtime: float, task: str) -> str:
+    """ファイル由来ペルソナの足場（mtime が変われば作り直す）"""
+    return _render_scaffold(_load_persona_cached(mtime), task)
 
-def get_persona_summary() -> str:
-    """ペルソナの簡易サマリーを返す（ログ・通知用）"""
-    p = load_persona()
+
+def build_system_prompt(
+    task: str = "daily_research",
+    rag_context: Optional[list[dict]] = None,
+    persona: Optional[dict] = None,
+) -> str:
+    """
+    タスクとRAGコンテキストを元にシステムプロンプトを生成
+
+    Args:
+        task: タスク種別 ("daily_research", "article_writing", "reflection")
+        rag_context: RAGから取得した関連ドキュメント（Phase 2以降）
+        persona: ペルソナ設定（Noneの場合はデフォルト）
+    """
+    if persona:
+        scaffold = _render_scaffold(persona, task)
+    else:
+        scaffold = _cached_scaffold(_persona_mtime(), task)
+
+    # RAGコンテキストがあれば追加（呼び出しごとに変わるのはここだけ）
+    rag_section = ""
+    if rag_context:
+        rag_section = "\n\n## 参照コンテキスト（過去の発言・記録）\n"
+        for i, doc in enumerate(rag_context[:5], 1):
+            src = doc.get("metadata", {}).get("source", "unknown")
+            rag_section += f"\n[{i}] ({src})\n{doc['text'][:300]}\n"
+
+    return scaffold.replace(RAG_PLACEHOLDER, rag_section, 1)
+
+
+@functools.lru_cache(maxsize=4)
+def _persona_summary(mtime: float) -> str:
+    p = _load_persona_cached(mtime)
     interests = p.get("interests", [])
     return f"{p.get('name', 'Admin')} | 興味: {', '.join(interests[:2])}..."
 
 
+def get_persona_summary() -> str:
+    """ペルソナの簡易サマリーを返す（ログ・通知用）"""
+    return _persona_summary(_persona_mtime())
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     print("=== Persona System Prompt (daily_research) ===\n")
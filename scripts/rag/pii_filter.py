@@ -3,9 +3,17 @@ pii_filter.py - PII（個人識別情報）除去フィルター
 
 Chrome履歴・テキストデータからセンシティブな情報を除去する。
 LlamaIndex PIINodePostprocessor のシンプル代替実装。
+
+hyperscan（任意）がインストールされていれば、大量URLの判定を
+sensitive_url_flags() で1回のスキャンにまとめる。
 """
 
+import bisect
+import itertools
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
 from urllib.parse import urlparse
 
 # ─── 除外URLパターン ─────────────────────────────────────────────────────────
@@ -29,6 +37,9 @@ EXCLUDE_URL_PATTERNS = [
     r"internal\.", r"intranet\.",
 ]
 
+# 全パターンを1つの選択に束ね、URL を1回の走査で判定する
+_URL_RE = re.compile("|".join(f"(?:{p})" for p in EXCLUDE_URL_PATTERNS))
+
 EXCLUDE_DOMAINS = {
     "accounts.google.com",
     "myaccount.google.com",
@@ -56,33 +67,104 @@ PII_TEXT_PATTERNS = [
     (r'\b\d{4}\s?\d{4}\s?\d{4}\b', '[ID]'),
 ]
 
+# 全パターンを1つの選択に束ね、1回の走査でマスクする（グループ名 → 置換文字列）
+_PII_REPLACEMENTS = {f"p{i}": replacement for i, (_, replacement) in enumerate(PII_TEXT_PATTERNS)}
+_RE_PII = re.compile("|".join(
+    f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(PII_TEXT_PATTERNS)
+))
 
-# ─── URL フィルター ───────────────────────────────────────────────────────────
 
-def is_sensitive_url(url: str) -> bool:
-    """URLがセンシティブかどうかを判定"""
-    url_lower = url.lower()
+# ─── URL フィルター ───────────────────────────────────────────────────────────
 
-    # ドメイン除外リスト
+def _fast_netloc(url: str) -> str:
+    """"scheme://netloc/..." の netloc を文字列走査で取り出す（urlparse の代替）
+
+    "://" がない、またはスキームが英数字でない URL は urlparse に任せる。
+    """
+    i = url.find("://")
+    if i > 0 and url[:i].isalnum():
+        j = url.find("/", i + 3)
+        netloc = url[i + 3:j] if j >= 0 else url[i + 3:]
+        if "?" in netloc or "#" in netloc:
+            netloc = netloc.split("?", 1)[0].split("#", 1)[0]
+        return netloc
     try:
-        domain = urlparse(url).netloc.lower()
-        if domain in EXCLUDE_DOMAINS:
-            return True
+        return urlparse(url).netloc
     except Exception:
-        pass
-
-    # パターンマッチング
-    for pattern in EXCLUDE_URL_PATTERNS:
-        if re.search(pattern, url_lower):
-            return True
+        return ""
 
-    return False
 
+def is_sensitive_url(url: str) -> bool:
+    """URLがセンシティブかどうかを判定"""
+    # パターンマッチング（大半の除外はここで決まるので urlparse より先に判定）
+    if _URL_RE.search(url.lower()):
+        return True
 
-def filter_urls(entries: list[dict], url_key: str = "url") -> list[dict]:
-    """URLリストからセンシティブなエントリを除去"""
-    filtered = [e for e in entries if not is_sensitive_url(e.get(url_key, ""))]
-    removed = len(entries) - len(filtered)
+    # ドメイン除外リスト
+    return _fast_netloc(url).lower() in EXCLUDE_DOMAINS
+
+
+_hs_db = None
+
+
+def _get_hs_db():
+    """EXCLUDE_URL_PATTERNS の hyperscan DB（未インストール時は None）"""
+    global _hs_db
+    if _hs_db is None:
+        try:
+            import hyperscan
+        except ImportError:
+            _hs_db = False
+            return None
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in EXCLUDE_URL_PATTERNS],
+            ids=list(range(len(EXCLUDE_URL_PATTERNS))),
+            elements=len(EXCLUDE_URL_PATTERNS),
+        )
+        _hs_db = db
+    return _hs_db or None
+
+
+def sensitive_url_flags(urls: list[str]) -> list[bool]:
+    """urls それぞれが is_sensitive_url に該当するかをまとめて判定
+
+    hyperscan があれば全URLを改行で連結して1回だけスキャンし、
+    パターンに該当しなかったURLだけドメイン除外リストを確認する。
+    """
+    db = _get_hs_db()
+    if db is None:
+        return [is_sensitive_url(u) for u in urls]
+
+    encoded = [u.lower().encode() for u in urls]
+    # 各URLの終端オフセット（マッチ終端 → URL の添字を二分探索で引く）
+    ends, pos = [], 0
+    for b in encoded:
+        pos += len(b)
+        ends.append(pos)
+        pos += 1  # 区切りの改行（除外パターンは改行をまたいでマッチしない）
+
+    flags = [False] * len(urls)
+
+    def on_match(pattern_id, start, end, match_flags, context):
+        flags[bisect.bisect_left(ends, end)] = True
+
+    db.scan(b"\n".join(encoded), match_event_handler=on_match)
+
+    for i, url in enumerate(urls):
+        if not flags[i]:
+            flags[i] = _fast_netloc(url).lower() in EXCLUDE_DOMAINS
+    return flags
+
+
+def filter_urls(entries: Iterable[dict], url_key: str = "url") -> list[dict]:
+    """URLリストからセンシティブなエントリを除去（ジェネレータも受け付ける）"""
+    filtered, total = [], 0
+    for e in entries:
+        total += 1
+        if not is_sensitive_url(e.get(url_key, "")):
+            filtered.append(e)
+    removed = total - len(filtered)
     if removed > 0:
         import logging
         logging.getLogger(__name__).info(f"PII filter: {removed}件のセンシティブURLを除去")
@@ -91,11 +173,38 @@ def filter_urls(entries: list[dict], url_key: str = "url") -> list[dict]:
 
 # ─── テキスト PII マスキング ──────────────────────────────────────────────────
 
+def _replace_pii(m: re.Match) -> str:
+    return _PII_REPLACEMENTS[m.lastgroup]
+
+
 def mask_pii(text: str) -> str:
     """テキスト内のPII（メール・電話番号等）をマスキング"""
-    for pattern, replacement in PII_TEXT_PATTERNS:
-        text = re.sub(pattern, replacement, text)
-    return text
+    return _RE_PII.sub(_replace_pii, text)
+
+
+# この件数以上ならプロセス並列でマスクする（それ未満はプロセス起動・転送のコストが上回る）
+PARALLEL_MIN_TEXTS = 20_000
+
+
+def _mask_chunk(texts: list[str]) -> list[str]:
+    sub = _RE_PII.sub
+    return [sub(_replace_pii, t) for t in texts]
+
+
+def mask_pii_batch(texts: list[str]) -> list[str]:
+    """テキストリストのPIIをまとめてマスキング
+
+    件数が PARALLEL_MIN_TEXTS 以上なら CPU 数のプロセスに分割する
+    （re.sub は GIL を解放しないのでスレッドでは並列にならない）。
+    """
+    workers = os.cpu_count() or 1
+    if len(texts) < PARALLEL_MIN_TEXTS or workers < 2:
+        return _mask_chunk(texts)
+
+    size = -(-len(texts) // workers)
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(itertools.chain.from_iterable(pool.map(_mask_chunk, chunks)))
 
 
 def filter_tweets(tweets: list[dict], text_key: str = "text") -> list[dict]:
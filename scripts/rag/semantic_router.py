@@ -10,9 +10,14 @@ Phase 2 以降で本家 semantic-router に置き換え予定。
   - その他 → BOTH（両方から検索してマージ）
 """
 
+import functools
+import heapq
+import itertools
 import re
 import logging
 from enum import Enum
+from operator import itemgetter
+from typing import Optional
 
 log = logging.getLogger(__name__)
 
@@ -63,14 +68,70 @@ PUBLIC_KEYWORDS = [
 ]
 
 
+def _fuse_keywords(groups: dict[str, list[str]]) -> re.Pattern:
+    """全キーワードを1本の正規表現にまとめる（グループ名は "<prefix><index>"）
+
+    先読み (?=...) で各位置をゼロ幅で調べるため、マッチ同士が重なっても取りこぼさない。
+    各キーワードの先頭文字は互いに異なるので、同じ位置で複数がマッチすることはない。
+    """
+    alternatives = [
+        f"(?P<{prefix}{i}>{p})"
+        for prefix, patterns in groups.items()
+        for i, p in enumerate(patterns)
+    ]
+    return re.compile(f"(?=(?:{'|'.join(alternatives)}))")
+
+
+_KEYWORD_GROUPS = {"priv": PRIVATE_KEYWORDS, "pub": PUBLIC_KEYWORDS}
+_KEYWORD_RE = _fuse_keywords(_KEYWORD_GROUPS)
+
+
+def _expand_literals(pattern: str) -> list[str]:
+    """"私(が|は)" のような 文字列+選択グループ だけのパターンを全リテラルに展開"""
+    parts = [
+        alt.split("|") if alt else [lit]
+        for lit, alt in re.findall(r"([^()|]+)|\(([^()]*)\)", pattern)
+    ]
+    return ["".join(p) for p in itertools.product(*parts)]
+
+
+def _build_automaton():
+    """pyahocorasick（任意）の Automaton を作る。未導入なら None（正規表現で判定）"""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    automaton = ahocorasick.Automaton()
+    for prefix, patterns in _KEYWORD_GROUPS.items():
+        for i, p in enumerate(patterns):
+            for literal in _expand_literals(p):
+                automaton.add_word(literal, f"{prefix}{i}")
+    automaton.make_automaton()
+    return automaton
+
+
+# キーワードはすべて有限個のリテラルに展開できるので、Aho–Corasick で正規表現と同じ判定になる
+_KEYWORD_AC: Optional[object] = _build_automaton()
+
+
+def _keyword_hits(query: str) -> set[str]:
+    """query にヒットしたキーワードのグループ名（"priv3" など）の集合"""
+    if _KEYWORD_AC is not None:
+        return {name for _, name in _KEYWORD_AC.iter(query)}
+    return {m.lastgroup for m in _KEYWORD_RE.finditer(query)}
+
+
+@functools.lru_cache(maxsize=1024)
 def route(query: str) -> Route:
-    """クエリを解析してルーティング先を決定"""
-    private_score = sum(
-        1 for p in PRIVATE_KEYWORDS if re.search(p, query)
-    )
-    public_score = sum(
-        1 for p in PUBLIC_KEYWORDS if re.search(p, query)
-    )
+    """クエリを解析してルーティング先を決定
+
+    判定はクエリ文字列だけで決まるのでメモ化している。
+    実行中にキーワード定義を変えた場合は route.cache_clear() を呼ぶこと。
+    """
+    # 1回の走査でヒットしたキーワードを集め、キーワードごとに1点として数える
+    hits = _keyword_hits(query)
+    private_score = sum(1 for h in hits if h.startswith("priv"))
+    public_score = len(hits) - private_score
 
     log.debug(f"Route scores — private: {private_score}, public: {public_score}")
 
@@ -94,21 +155,29 @@ def route_and_search(
     log.info(f"Query routed to: {destination.value} | '{query[:60]}'")
 
     results = []
-    if destination in (Route.PRIVATE, Route.BOTH):
-        private_docs = vector_store.query(query, n_results, COLLECTION_PRIVATE)
-        for doc in private_docs:
-            doc["source"] = "private"
-        results.extend(private_docs)
-
-    if destination in (Route.PUBLIC, Route.BOTH):
-        public_docs = vector_store.query(query, n_results, COLLECTION_PUBLIC)
-        for doc in public_docs:
-            doc["source"] = "public"
-        results.extend(public_docs)
-
-    # 距離スコアでソート（昇順 = 類似度高い順）
-    results.sort(key=lambda x: x.get("distance") or 1.0)
-    return results[:n_results]
+    if destination == Route.BOTH:
+        # 両方を検索する場合はクエリの埋め込みを1回で済ませ、2コレクションを並列検索
+        found = vector_store.query_many(query, [COLLECTION_PRIVATE, COLLECTION_PUBLIC], n_results)
+        private_docs, public_docs = found[COLLECTION_PRIVATE], found[COLLECTION_PUBLIC]
+    else:
+        private_docs = public_docs = []
+        if destination == Route.PRIVATE:
+            private_docs = vector_store.query(query, n_results, COLLECTION_PRIVATE)
+        else:
+            public_docs = vector_store.query(query, n_results, COLLECTION_PUBLIC)
+
+    for doc in private_docs:
+        doc["source"] = "private"
+    results.extend(private_docs)
+    for doc in public_docs:
+        doc["source"] = "public"
+    results.extend(public_docs)
+
+    # 距離の昇順（= 類似度が高い順）に上位 n_results 件。距離がないものは最下位扱い
+    for doc in results:
+        if doc.get("distance") is None:
+            doc["distance"] = 1.0
+    return heapq.nsmallest(n_results, results, key=itemgetter("distance"))
 
 
 if __name__ == "__main__":
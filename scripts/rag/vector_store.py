@@ -8,11 +8,23 @@ Phase 2: Qdrant（self-host）に移行予定
   - personal_private : 個人プライベートデータ（Twitter, Chrome履歴）
   - personal_public  : 公開知識・著名人IP
   - agent_memory     : エージェントの作業記憶
+
+埋め込み:
+  既存コレクションは Chroma デフォルトef（all-MiniLM-L6-v2）。
+  VECTOR_STORE_EMBEDDER=fastembed のとき、新規作成するコレクションだけ fastembed（ONNX Runtime）で
+  埋め込む。使った埋め込みはコレクションの metadata["embedder"] に記録し、
+  open_collection() が記録どおりの埋め込み関数を付けて開く（chroma_embedders.py）。
+  import_twitter --ollama-embed で作ったコレクションは "ollama:<model>" と記録され、検索も Ollama で埋め込む。
+  既存コレクションはこの設定に関係なく作成時の埋め込みを使い続ける。
+  コレクションを開く箇所（VectorStore / MemoryManager / import_twitter）はすべて open_collection() を使う。
 """
 
+import functools
 import os
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -25,15 +37,126 @@ COLLECTION_PRIVATE = "personal_private"
 COLLECTION_PUBLIC  = "personal_public"
 COLLECTION_MEMORY  = "agent_memory"
 
+# コレクション作成時の埋め込みモデル（Chroma デフォルトef）
+DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2"
+
+# 新規コレクションの埋め込み（"default" または "fastembed"）
+VECTOR_STORE_EMBEDDER = os.environ.get("VECTOR_STORE_EMBEDDER", "default")
+# fastembed のモデル（日本語を含むので多言語モデル）
+FASTEMBED_MODEL = os.environ.get(
+    "FASTEMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+FASTEMBED_PREFIX = "fastembed:"
+# Ollama /api/embed で埋め込むコレクション（import_twitter --ollama-embed で作成）
+OLLAMA_PREFIX = "ollama:"
+
+# クエリ埋め込みの LRU キャッシュ件数（BOTH ルーティング・再試行で同じクエリが繰り返される）
+QUERY_EMBED_CACHE_SIZE = 512
+
+# 新規コレクションの HNSW パラメータ（個人 RAG 規模 = 10万件未満で再現率寄りに調整）。
+# Chroma は作成後に変更できないため、既存コレクションには適用されない
+HNSW_PARAMS = {
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+    "hnsw:num_threads": os.cpu_count() or 1,
+}
+# コレクションごとの上書き（作業記憶は小さく書き込みが頻繁なのでディスク同期をまとめる）
+HNSW_OVERRIDES = {
+    COLLECTION_MEMORY: {"hnsw:sync_threshold": 10000},
+}
+
+
+def collection_metadata(name: str, overrides: Optional[dict] = None) -> dict:
+    """新規コレクション作成時の metadata（cosine + HNSW_PARAMS + コレクション別の上書き）
+
+    コレクションを作りうる箇所（VectorStore / MemoryManager / import_twitter）はすべてこれを使う。
+    get_or_create_collection は既存コレクションの metadata を変えないので、毎回渡してよい。
+    """
+    return {"hnsw:space": "cosine", **HNSW_PARAMS, **HNSW_OVERRIDES.get(name, {}), **(overrides or {})}
+
+
+def default_embedder() -> str:
+    """新規コレクションに使う埋め込みキー（VECTOR_STORE_EMBEDDER で切り替え）"""
+    if VECTOR_STORE_EMBEDDER == "fastembed":
+        return FASTEMBED_PREFIX + FASTEMBED_MODEL
+    return DEFAULT_EMBED_MODEL
+
+
+def collection_embedder(col) -> str:
+    """コレクションに記録された埋め込みキー（記録がなければ Chroma デフォルト）"""
+    return (col.metadata or {}).get("embedder", DEFAULT_EMBED_MODEL)
+
+
+def open_collection(
+    client,
+    name: str,
+    embedder: Optional[str] = None,
+    create: bool = True,
+    overrides: Optional[dict] = None,
+):
+    """記録済みの埋め込み関数を付けてコレクションを開く（create=True ならなければ作成）
+
+    既存コレクションは metadata["embedder"] の埋め込みで開く。embedder を指定して
+    記録と異なる場合は ValueError（別モデルのベクトルを混ぜない）。
+    新規作成時は embedder（省略時は default_embedder()）を記録する。
+    """
+    from .chroma_embedders import get_embedding_function
+
+    try:
+        recorded = collection_embedder(client.get_collection(name=name))
+    except Exception:
+        if not create:
+            raise
+        new_embedder = embedder or default_embedder()
+        metadata = {**collection_metadata(name, overrides), "embedder": new_embedder}
+        # 他プロセスが同時に作成した場合に備えて get_or_create で作る
+        col = client.get_or_create_collection(
+            name=name, metadata=metadata, embedding_function=get_embedding_function(new_embedder),
+        )
+        recorded = collection_embedder(col)
+        if recorded == new_embedder:
+            return col
+    if embedder and embedder != recorded:
+        raise ValueError(
+            f"コレクション '{name}' は {recorded} で埋め込まれています（指定: {embedder}）"
+        )
+    return client.get_collection(name=name, embedding_function=get_embedding_function(recorded))
+
+# add_documents で1回の col.add に渡す件数（埋め込みモデルのバッチに合わせる）
+ADD_BATCH_SIZE = 64
+
+# 1 にすると DENSE_MAX_DOCS 件以下のコレクションは全埋め込みを行列で持ち、HNSW ではなく内積1回で
+# 検索する（厳密検索。HNSW パラメータは使われない）。既定は HNSW
+DENSE_SEARCH = os.environ.get("VECTOR_STORE_DENSE_SEARCH", "0") == "1"
+DENSE_MAX_DOCS = 50_000
+# 行列キャッシュの有効期間（秒）。他プロセスの削除＋追加で件数が変わらない場合の取りこぼし対策
+DENSE_CACHE_TTL = 300
+# 行列を int8 + 行ごとのスケールで保持する（メモリ約1/4）。内積は DENSE_BLOCK 行ずつ float32 に戻して計算
+DENSE_QUANTIZE = True
+DENSE_BLOCK = 4096
+
 
 class VectorStore:
     """ChromaDB ラッパー（Phase 1: ローカルDB）"""
 
-    def __init__(self, persist_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        persist_dir: Optional[Path] = None,
+        hnsw_overrides: Optional[dict[str, dict]] = None,
+    ):
         self.persist_dir = persist_dir or EMBEDDINGS_DIR / "chromadb"
+        # {コレクション名: HNSW メタデータ} 新規作成時に collection_metadata をさらに上書きする
+        self.hnsw_overrides = hnsw_overrides or {}
         self.persist_dir.mkdir(parents=True, exist_ok=True)
         self._client = None
         self._collections: dict = {}
+        # コレクション名 → 埋め込みキー
+        self._embedders: dict[str, str] = {}
+        # コレクション名 → (読込時刻, 件数, texts, metadatas, 正規化済み埋め込み行列, 行スケール or None)
+        self._dense_cache: dict[str, tuple] = {}
+        # (埋め込みキー, テキスト) → 埋め込み（タプルで保持して呼び出し側の変更から守る）
+        self._embed_cached = functools.lru_cache(maxsize=QUERY_EMBED_CACHE_SIZE)(self._embed_uncached)
 
     def _get_client(self):
         """ChromaDB クライアントを遅延初期化"""
@@ -52,26 +175,44 @@ class VectorStore:
     def _get_collection(self, name: str):
         """コレクションを取得（なければ作成）"""
         if name not in self._collections:
-            client = self._get_client()
-            self._collections[name] = client.get_or_create_collection(
-                name=name,
-                metadata={"hnsw:space": "cosine"},
-            )
+            col = open_collection(self._get_client(), name, overrides=self.hnsw_overrides.get(name))
+            self._collections[name] = col
+            self._embedders[name] = collection_embedder(col)
         return self._collections[name]
 
+    @staticmethod
+    def _embed_uncached(embedder: str, text: str) -> tuple[float, ...]:
+        from .chroma_embedders import get_embedding_function
+        return tuple(float(x) for x in get_embedding_function(embedder)([text])[0])
+
+    def _embed_query(self, text: str, collection: str = COLLECTION_PRIVATE) -> list[float]:
+        """クエリを埋め込む（コレクション作成時と同じ埋め込み、同一クエリはキャッシュから）"""
+        self._get_collection(collection)
+        return list(self._embed_cached(self._embedders[collection], text))
+
     def add_documents(
         self,
         texts: list[str],
         metadatas: list[dict],
         ids: list[str],
         collection: str = COLLECTION_PRIVATE,
+        batch_size: int = ADD_BATCH_SIZE,
     ) -> int:
-        """ドキュメントをベクトルDBに追加"""
+        """ドキュメントをベクトルDBに追加（batch_size 件ずつ埋め込んで格納）"""
         col = self._get_collection(collection)
-        col.add(documents=texts, metadatas=metadatas, ids=ids)
+        for i in range(0, len(texts), batch_size):
+            batch = slice(i, i + batch_size)
+            col.add(documents=texts[batch], metadatas=metadatas[batch], ids=ids[batch])
+        self._dense_cache.pop(collection, None)
         log.info(f"Added {len(texts)} docs to collection '{collection}'")
         return len(texts)
 
+    def delete_documents(self, ids: list[str], collection: str = COLLECTION_PRIVATE) -> None:
+        """ID を指定してドキュメントを削除"""
+        self._get_collection(collection).delete(ids=ids)
+        self._dense_cache.pop(collection, None)
+        log.info(f"Deleted {len(ids)} docs from collection '{collection}'")
+
     def query(
         self,
         query_text: str,
@@ -86,19 +227,123 @@ class VectorStore:
             log.debug(f"Collection '{collection}' is empty, skipping query")
             return []
 
-        kwargs = {"query_texts": [query_text], "n_results": min(n_results, count)}
+        # 埋め込みは自前でキャッシュして渡す（Chroma に毎回再計算させない）
+        embedding = self._embed_query(query_text, collection)
+        return self._search(collection, col, count, embedding, n_results, where)
+
+    def query_many(
+        self,
+        query_text: str,
+        collections: list[str],
+        n_results: int = 5,
+    ) -> dict[str, list[dict]]:
+        """複数コレクションを同じクエリで検索（埋め込みはモデルごとに1回、検索は並列）
+
+        Returns:
+            {コレクション名: query() と同じ形式の結果}
+        """
+        cols = {name: self._get_collection(name) for name in collections}
+        counts = {name: col.count() for name, col in cols.items()}
+        targets = [name for name in collections if counts[name] > 0]
+        if not targets:
+            return {name: [] for name in collections}
+
+        # 同じ埋め込みのコレクション同士はキャッシュで1回の計算を共有する（スレッド投入前に済ませる）
+        embeddings = {name: self._embed_query(query_text, name) for name in targets}
+
+        def search(name: str) -> list[dict]:
+            return self._search(name, cols[name], counts[name], embeddings[name], n_results)
+
+        # HNSW 検索・行列積はネイティブ側で GIL を解放するのでスレッドで重ねられる
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            found = dict(zip(targets, pool.map(search, targets)))
+        return {name: found.get(name, []) for name in collections}
+
+    def _search(
+        self,
+        name: str,
+        col,
+        count: int,
+        embedding: list[float],
+        n_results: int,
+        where: Optional[dict] = None,
+    ) -> list[dict]:
+        """1コレクションを検索（DENSE_SEARCH 時の小さいコレクションは行列積、それ以外は HNSW）"""
+        if DENSE_SEARCH and where is None and count <= DENSE_MAX_DOCS:
+            dense = self._get_dense(name, col, count)
+            if dense is not None:
+                return self._dense_query(dense, embedding, n_results)
+        kwargs = {"query_embeddings": [embedding], "n_results": min(n_results, count)}
         if where:
             kwargs["where"] = where
+        return self._to_docs(col.query(**kwargs))
+
+    def _get_dense(self, name: str, col, count: int) -> Optional[tuple]:
+        """コレクション全体の正規化済み埋め込み行列（件数が変わるか TTL 切れで読み直す）"""
+        cached = self._dense_cache.get(name)
+        if cached and cached[1] == count and time.monotonic() - cached[0] < DENSE_CACHE_TTL:
+            return cached
+        try:
+            import numpy as np
 
-        results = col.query(**kwargs)
-        docs = []
-        for i, doc in enumerate(results["documents"][0]):
-            docs.append({
-                "text": doc,
-                "metadata": results["metadatas"][0][i],
-                "distance": results["distances"][0][i] if results.get("distances") else None,
-            })
-        return docs
+            got = col.get(include=["embeddings", "metadatas", "documents"])
+            matrix = np.asarray(got["embeddings"], dtype=np.float32)
+            if matrix.ndim != 2 or len(matrix) != len(got["documents"]):
+                return None
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+            scale = None
+            if DENSE_QUANTIZE:
+                from .embed_cache import quantize
+                matrix, scale = quantize(matrix)
+                scale = scale[:, 0].astype(np.float32)
+        except Exception as e:
+            log.warning(f"埋め込み行列の読み込み失敗（HNSW で検索）: {e}")
+            return None
+        cached = (time.monotonic(), count, got["documents"], got["metadatas"], matrix, scale)
+        self._dense_cache[name] = cached
+        return cached
+
+    @staticmethod
+    def _dense_query(dense: tuple, embedding: list[float], n_results: int) -> list[dict]:
+        """内積で上位 n_results 件を返す（distance は Chroma の cosine と同じ 1 - 類似度）"""
+        import numpy as np
+
+        _, _, texts, metas, matrix, scale = dense
+        q = np.asarray(embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        if scale is None:
+            scores = matrix @ q
+        else:
+            # NumPy の整数 matmul は BLAS を使わず遅いので、ブロックごとに float32 に戻して計算する
+            scores = np.empty(len(matrix), dtype=np.float32)
+            for i in range(0, len(matrix), DENSE_BLOCK):
+                block = slice(i, i + DENSE_BLOCK)
+                scores[block] = (matrix[block].astype(np.float32) @ q) * scale[block]
+        k = min(n_results, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"text": texts[i], "metadata": metas[i], "distance": float(1.0 - scores[i])}
+            for i in top
+        ]
+
+    @staticmethod
+    def _to_docs(results: dict) -> list[dict]:
+        """col.query() の結果（クエリ1件分）を {text, metadata, distance} のリストに変換"""
+        texts = results["documents"][0]
+        if not texts:
+            return []
+        metas = results["metadatas"][0]
+        dists = results.get("distances")
+        dists = dists[0] if dists else [None] * len(texts)
+        return [
+            {"text": t, "metadata": m, "distance": d}
+            for t, m, d in zip(texts, metas, dists)
+        ]
 
     def count(self, collection: str = COLLECTION_PRIVATE) -> int:
         """コレクション内のドキュメント数を返す"""
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+semantic_cache.py - LLM応答のセマンティックキャッシュ
+
+プロンプトの埋め込みベクトルでコサイン類似度検索し、十分に似た過去プロンプトが
+TTL内にあればLLMを呼ばずにその応答を返す。
+
+用途:
+  - think           : 日ごとに似通うトレンド一覧からのテーマ選定
+  - judge_importance: 短い会話の重要度判定
+
+名前空間（ns）ごとに検索するため、用途の異なる応答が混ざることはない。
+埋め込みの取得に失敗した場合、または enabled() が False の場合は
+キャッシュを使わずにそのままLLMを呼ぶ。
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import orjson
+
+log = logging.getLogger(__name__)
+
+# デフォルト設定
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_TTL = 24 * 60 * 60  # 秒
+MAX_ENTRIES_PER_NS = 200
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    if na == 0 or nb == 0:
+        return 0.0
+    return dot / (na * nb)
+
+
+class SemanticCache:
+    """埋め込みのコサイン類似度で引くLLM応答キャッシュ（JSONファイルに永続化）"""
+
+    def __init__(
+        self,
+        path: str,
+        embed: Callable[[str], list[float]],
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        enabled: Optional[Callable[[], bool]] = None,
+    ):
+        self.path = path
+        self.embed = embed
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # {ns: [{"t": 保存時刻, "v": 埋め込み, "r": 応答}, ...]}
+        self._entries: dict[str, list[dict]] = self._load()
+
+    def _load(self) -> dict[str, list[dict]]:
+        try:
+            with open(self.path, "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """期限切れを除いてファイルに書き出す"""
+        now = time.time()
+        with self._lock:
+            data = {
+                ns: [e for e in entries if now - e["t"] < self.ttl]
+                for ns, entries in self._entries.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "wb") as f:
+                f.write(orjson.dumps(data))
+        except OSError as e:
+            log.warning(f"セマンティックキャッシュ保存失敗: {e}")
+
+    def _lookup(self, ns: str, vec: list[float]) -> Optional[str]:
+        now = time.time()
+        best_sim, best = 0.0, None
+        with self._lock:
+            for e in self._entries.get(ns, []):
+                if now - e["t"] >= self.ttl:
+                    continue
+                sim = _cosine(vec, e["v"])
+                if sim > best_sim:
+                    best_sim, best = sim, e
+        if best is not None and best_sim >= self.threshold:
+            log.info(f"セマンティックキャッシュ hit [{ns}] (cos={best_sim:.3f})")
+            return best["r"]
+        return None
+
+    def _store(self, ns: str, vec: list[float], response: str) -> None:
+        now = time.time()
+        with self._lock:
+            entries = [e for e in self._entries.get(ns, []) if now - e["t"] < self.ttl]
+            entries.append({"t": now, "v": vec, "r": response})
+            self._entries[ns] = entries[-MAX_ENTRIES_PER_NS:]
+
+    def cached(self, ns: str, text: str, generate: Callable[[], str]) -> str:
+        """text に類似するキャッシュがあれば返し、なければ generate() を呼んで保存"""
+        if self.enabled is not None and not self.enabled():
+            return generate()
+        try:
+            vec = self.embed(text)
+        except Exception as e:
+            log.warning(f"セマンティックキャッシュ埋め込み失敗: {e}")
+            return generate()
+
+        hit = self._lookup(ns, vec)
+        if hit is not None:
+            return hit
+        response = generate()
+        if response:
+            self._store(ns, vec, response)
+        return response
@@ -157,6 +157,16 @@ if [ "$SKIP_OLLAMA" = false ]; then
             log_info "qwen3:8b ダウンロード完了"
         fi
 
+        # セマンティックキャッシュ用の埋め込みモデル（autonomous_agent.py の OLLAMA_EMBED_MODEL）
+        EMBED_MODEL="${OLLAMA_EMBED_MODEL:-nomic-embed-text}"
+        if ollama list 2>/dev/null | grep -q "$EMBED_MODEL"; then
+            log_info "$EMBED_MODEL インストール済み"
+        else
+            log_step "$EMBED_MODEL をダウンロード..."
+            ollama pull "$EMBED_MODEL"
+            log_info "$EMBED_MODEL ダウンロード完了"
+        fi
+
         # 動作確認
         log_step "qwen3:8b の動作確認..."
         TEST_RESP=$(curl -s -X POST http://localhost:11434/api/generate \
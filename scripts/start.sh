@@ -223,7 +223,11 @@ start_daemon() {
     # Ollama サーバーが起動していなければ起動
     if ! curl -s http://localhost:11434/api/tags &>/dev/null; then
         log_step "Ollama サーバーを起動..."
-        ollama serve >>"$LOG_DIR/ollama.log" 2>&1 &
+        # 並列推論: 同一モデルへの同時リクエスト数 / 同時ロードモデル数
+        # （qwen3:8b + チャットモデル + セマンティックキャッシュ用の埋め込みモデル）
+        OLLAMA_NUM_PARALLEL="${OLLAMA_NUM_PARALLEL:-4}" \
+        OLLAMA_MAX_LOADED_MODELS="${OLLAMA_MAX_LOADED_MODELS:-3}" \
+            ollama serve >>"$LOG_DIR/ollama.log" 2>&1 &
         sleep 3
         if curl -s http://localhost:11434/api/tags &>/dev/null; then
             log_info "Ollama 起動完了"